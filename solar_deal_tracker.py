@@ -1,9 +1,16 @@
 import os
-import json
+import asyncio
+import mmap
+import re
+import sys
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timedelta, timezone
+from itertools import chain
+from operator import itemgetter
 from zoneinfo import ZoneInfo
 
 import discord
+import orjson
 from discord.ext import commands
 
 # ------------------------
@@ -29,31 +36,338 @@ DATA_DIR = "./data"
 os.makedirs(DATA_DIR, exist_ok=True)
 
 DEALS_FILE = os.path.join(DATA_DIR, "deals.json")
+# Append-only change log replayed on top of DEALS_FILE at startup.
+# DEALS_FILE is only rewritten when the log is compacted into it.
+DEALS_LOG = os.path.join(DATA_DIR, "deals.log")
+# Don't bother compacting until the log is at least this big
+COMPACT_MIN_BYTES = 64 * 1024
+
+
+def _apply_log_entry(data: dict, entry: dict):
+    """Replay one deals.log entry onto the loaded data."""
+    seq = entry.get("seq")
+    if seq is not None:
+        # The snapshot already covers everything up to its log_seq
+        if seq <= data["log_seq"]:
+            return
+        data["log_seq"] = seq
+    op = entry.get("op")
+    if op == "add":
+        deal = entry["deal"]
+        # Ids only go up, so an older id is already in the snapshot (or was
+        # deleted by a later entry); this keeps replay idempotent if we
+        # crashed between writing a snapshot and truncating the log.
+        if deal["id"] >= data["next_id"]:
+            data["deals"].append(deal)
+            data["next_id"] = deal["id"] + 1
+    elif op == "cancel":
+        for d in data["deals"]:
+            if d["id"] == entry["id"]:
+                d["status"] = "canceled"
+                d["canceled_at"] = entry.get("canceled_at")
+                break
+    elif op == "delete":
+        data["deals"] = [d for d in data["deals"] if d["id"] != entry["id"]]
+    elif op == "clear":
+        data["deals"] = [d for d in data["deals"] if d.get("guild_id") != entry["guild_id"]]
+
+
+def _deal_type(kw: float) -> str:
+    return "battery_only" if kw == 0.0 else "solar_battery"
+
+
+def _customer_key(customer_name: str) -> str:
+    return customer_name.strip().lower()
 
 
 def _load_deals():
-    if not os.path.exists(DEALS_FILE):
-        return {"next_id": 1, "deals": []}
-    try:
-        with open(DEALS_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        if "next_id" not in data:
-            data["next_id"] = 1
-        if "deals" not in data:
-            data["deals"] = []
-        return data
-    except Exception:
-        return {"next_id": 1, "deals": []}
+    data = {"next_id": 1, "log_seq": 0, "deals": []}
+    if os.path.exists(DEALS_FILE):
+        try:
+            # Parse straight out of the page cache; orjson takes the
+            # buffer as-is, so the file is never copied into a bytes object
+            with open(DEALS_FILE, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as buf:
+                    data = orjson.loads(buf)
+            if "next_id" not in data:
+                data["next_id"] = 1
+            if "deals" not in data:
+                data["deals"] = []
+            if "log_seq" not in data:
+                data["log_seq"] = 0
+        except Exception:
+            data = {"next_id": 1, "log_seq": 0, "deals": []}
+
+    if os.path.exists(DEALS_LOG):
+        with open(DEALS_LOG, "rb") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    _apply_log_entry(data, orjson.loads(line))
+                except Exception:
+                    # Torn last line from a crash mid-write
+                    break
+
+    # Older files can hold kw as a string or null, and may predate
+    # deal_type; fix both once here so the aggregation paths can use
+    # d["kw"] and d["deal_type"] directly.
+    for d in data["deals"]:
+        d["kw"] = float(d.get("kw") or 0.0)
+        if d.get("deal_type") is None:
+            d["deal_type"] = _deal_type(d["kw"])
+        if "customer_key" not in d:
+            d["customer_key"] = _customer_key(d.get("customer_name") or "")
+    return data
+
+
+def _public(deal: dict) -> dict:
+    """The deal without its in-memory-only "_" fields, for writing out."""
+    return {k: v for k, v in deal.items() if not k.startswith("_")}
+
+
+def _snapshot_bytes(data) -> bytes:
+    # In memory the deals live per guild in _IDX_BY_ID; on disk they stay
+    # one flat list in id order
+    deals = sorted(
+        (d for by_id in _IDX_BY_ID.values() for d in by_id.values()),
+        key=lambda d: d["id"],
+    )
+    out = dict(data, deals=[_public(d) for d in deals])
+    return orjson.dumps(out, option=orjson.OPT_INDENT_2)
+
 
+# ------------------------
+# In-memory indexes
+# ------------------------
 
-def _save_deals(data):
+# Per-guild deals sorted by created_at, with the parallel list of their
+# created_at in epoch microseconds so period lookups can bisect on ints
+# instead of scanning.
+_IDX_BY_GUILD_TIME: dict[int, list[dict]] = {}
+_IDX_GUILD_TIMES: dict[int, list[int]] = {}
+# _IDX_BY_ID[guild_id][deal_id] = deal, in id order. This is where the
+# deals live once loaded; DEALS_DATA itself only keeps next_id.
+_IDX_BY_ID: dict[int, dict[int, dict]] = {}
+# Bumped on every change to a guild's deals. Never reset, so a cached
+# render can't be mistaken for current after a #clearleaderboard.
+_mutation_seq: dict[int, int] = {}
+# _IDX_BY_CUSTOMER[guild_id][customer_key] = that customer's deals,
+# oldest first, so the latest one is at the tail
+_IDX_BY_CUSTOMER: dict[int, dict[str, list[dict]]] = {}
+# _IDX_BY_USER[guild_id][user_id][deal_id] = deal, under both the closer
+# and the setter id; _IDX_BY_SETTER_KEY does the same by _setter_key for
+# setters logged without an @mention. Together they answer
+# _get_user_deals without walking the guild.
+_IDX_BY_USER: dict[int, dict[int, dict[int, dict]]] = {}
+_IDX_BY_SETTER_KEY: dict[int, dict[str, dict[int, dict]]] = {}
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ONE_US = timedelta(microseconds=1)
+
+
+def _to_us(dt: datetime) -> int:
+    """Epoch microseconds, exact (no float rounding at period edges)."""
+    return (dt - _EPOCH) // _ONE_US
+
+
+def _created_us(deal: dict) -> int | None:
+    """
+    created_at in epoch microseconds, parsed once and cached on the deal
+    as _ts_us. Keys starting with "_" are never written to disk.
+    """
+    if "_ts_us" in deal:
+        return deal["_ts_us"]
+    ts_us = None
+    created_raw = deal.get("created_at")
+    if created_raw:
+        try:
+            ts_us = _to_us(datetime.fromisoformat(created_raw))
+        except Exception:
+            pass
+    deal["_ts_us"] = ts_us
+    return ts_us
+
+
+def _created_sort_key(deal: dict) -> int:
+    ts_us = deal["_ts_us"]
+    return -1 if ts_us is None else ts_us
+
+
+def _note_change(guild_id: int):
+    _mutation_seq[guild_id] = _mutation_seq.get(guild_id, 0) + 1
+
+
+def _index_add(deal: dict):
+    guild_id = deal.get("guild_id")
+    _note_change(guild_id)
+    _IDX_BY_ID.setdefault(guild_id, {})[deal["id"]] = deal
+    created = _created_us(deal)
+    # Normalized setter name for _get_user_deals' name fallback; interned
+    # so a rep's many deals share one string
+    deal["_setter_key"] = sys.intern((deal.get("setter_name") or "").lower().strip())
+    by_user = _IDX_BY_USER.setdefault(guild_id, {})
+    for uid in {deal.get("closer_id"), deal.get("setter_id")}:
+        if uid is not None:
+            by_user.setdefault(uid, {})[deal["id"]] = deal
+    if deal["_setter_key"]:
+        _IDX_BY_SETTER_KEY.setdefault(guild_id, {}).setdefault(deal["_setter_key"], {})[deal["id"]] = deal
+
+    by_customer = _IDX_BY_CUSTOMER.setdefault(guild_id, {}).setdefault(deal["customer_key"], [])
+    by_customer.append(deal)
+    if len(by_customer) > 1 and _created_sort_key(by_customer[-2]) > _created_sort_key(deal):
+        by_customer.sort(key=_created_sort_key)
+
+    if created is None:
+        # No usable created_at, so it can never match a period
+        return
+    deals = _IDX_BY_GUILD_TIME.setdefault(guild_id, [])
+    times = _IDX_GUILD_TIMES.setdefault(guild_id, [])
+    if not times or times[-1] <= created:
+        # New deals are always the latest, so this is the normal path
+        deals.append(deal)
+        times.append(created)
+    else:
+        idx = bisect_right(times, created)
+        deals.insert(idx, deal)
+        times.insert(idx, created)
+
+
+def _index_remove(deal: dict):
+    guild_id = deal.get("guild_id")
+    _note_change(guild_id)
+    _IDX_BY_ID.get(guild_id, {}).pop(deal["id"], None)
+    by_customer = _IDX_BY_CUSTOMER.get(guild_id, {}).get(deal["customer_key"])
+    if by_customer:
+        by_customer[:] = [d for d in by_customer if d is not deal]
+        if not by_customer:
+            del _IDX_BY_CUSTOMER[guild_id][deal["customer_key"]]
+    by_user = _IDX_BY_USER.get(guild_id, {})
+    for uid in {deal.get("closer_id"), deal.get("setter_id")}:
+        user_deals = by_user.get(uid)
+        if user_deals is not None:
+            user_deals.pop(deal["id"], None)
+            if not user_deals:
+                del by_user[uid]
+    by_setter = _IDX_BY_SETTER_KEY.get(guild_id, {})
+    setter_deals = by_setter.get(deal["_setter_key"])
+    if setter_deals is not None:
+        setter_deals.pop(deal["id"], None)
+        if not setter_deals:
+            del by_setter[deal["_setter_key"]]
+    created = _created_us(deal)
+    times = _IDX_GUILD_TIMES.get(guild_id)
+    if created is None or not times:
+        return
+    deals = _IDX_BY_GUILD_TIME[guild_id]
+    idx = bisect_left(times, created)
+    while idx < len(times) and times[idx] == created:
+        if deals[idx] is deal:
+            del deals[idx]
+            del times[idx]
+            return
+        idx += 1
+
+
+def _index_drop_guild(guild_id: int):
+    _note_change(guild_id)
+    _IDX_BY_GUILD_TIME.pop(guild_id, None)
+    _IDX_GUILD_TIMES.pop(guild_id, None)
+    _IDX_BY_ID.pop(guild_id, None)
+    _IDX_BY_CUSTOMER.pop(guild_id, None)
+    _IDX_BY_USER.pop(guild_id, None)
+    _IDX_BY_SETTER_KEY.pop(guild_id, None)
+
+
+def _rebuild_indexes(deals: list[dict]):
+    """One pass over all deals to seed the indexes at startup."""
+    _IDX_BY_GUILD_TIME.clear()
+    _IDX_GUILD_TIMES.clear()
+    _IDX_BY_ID.clear()
+    _IDX_BY_CUSTOMER.clear()
+    _IDX_BY_USER.clear()
+    _IDX_BY_SETTER_KEY.clear()
+    for d in deals:
+        _index_add(d)
+
+
+DEALS_DATA = _load_deals()
+_rebuild_indexes(DEALS_DATA.pop("deals"))
+
+_log_fh = open(DEALS_LOG, "ab", buffering=0)
+# Size of DEALS_FILE as of the last compaction
+_snapshot_size = os.path.getsize(DEALS_FILE) if os.path.exists(DEALS_FILE) else 0
+
+# Encoded log lines waiting for _log_writer. Handlers only enqueue, so the
+# disk writes and fsyncs never run on the event loop.
+_log_queue: asyncio.Queue = asyncio.Queue()
+_log_writer_task: asyncio.Task | None = None
+
+
+def _write_log(lines: bytes):
+    _log_fh.write(lines)
+    os.fsync(_log_fh.fileno())
+
+
+def _write_snapshot(data_bytes: bytes):
     tmp = DEALS_FILE + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    with open(tmp, "wb") as f:
+        f.write(data_bytes)
     os.replace(tmp, DEALS_FILE)
+    _log_fh.truncate(0)
+    _log_fh.seek(0)
 
 
-DEALS_DATA = _load_deals()
+async def _compact():
+    """Fold deals.log into a fresh deals.json and start the log over."""
+    global _snapshot_size
+    # Encoded on the loop so it matches DEALS_DATA["log_seq"] exactly;
+    # records queued after that go into the fresh log, and replay skips
+    # anything at or below the snapshot's log_seq.
+    data_bytes = _snapshot_bytes(DEALS_DATA)
+    await asyncio.to_thread(_write_snapshot, data_bytes)
+    _snapshot_size = len(data_bytes)
+
+
+async def _log_writer():
+    """
+    Write queued records to deals.log in batches. Compacts once the log
+    has grown past twice the last snapshot.
+    """
+    while True:
+        batch = [await _log_queue.get()]
+        while not _log_queue.empty():
+            batch.append(_log_queue.get_nowait())
+        try:
+            await asyncio.to_thread(_write_log, b"".join(batch))
+            if _log_fh.tell() > max(2 * _snapshot_size, COMPACT_MIN_BYTES):
+                await _compact()
+        except Exception as e:
+            print(f"[_log_writer] error: {e}")
+
+
+def _drain_log_queue():
+    """Write out whatever is still queued once the bot has stopped."""
+    batch = []
+    while not _log_queue.empty():
+        batch.append(_log_queue.get_nowait())
+    if batch:
+        _write_log(b"".join(batch))
+
+
+def _append_record(rec: dict):
+    """
+    Record one change in deals.log instead of rewriting deals.json.
+    The record is encoded now and written by _log_writer in the background.
+    """
+    global _log_writer_task
+    DEALS_DATA["log_seq"] += 1
+    rec["seq"] = DEALS_DATA["log_seq"]
+    _log_queue.put_nowait(orjson.dumps(rec) + b"\n")
+    if _log_writer_task is None or _log_writer_task.done():
+        _log_writer_task = asyncio.create_task(_log_writer())
+
 
 # ------------------------
 # Discord bot setup
@@ -77,10 +391,6 @@ LEADERBOARD_CHANNELS = {
 # ------------------------
 
 
-def _deal_type(kw: float) -> str:
-    return "battery_only" if kw == 0.0 else "solar_battery"
-
-
 def _deal_type_label(dtype: str) -> str:
     if dtype == "battery_only":
         return "Battery Only 🔋"
@@ -95,7 +405,8 @@ def _parse_date(date_str: str):
 
 
 def _get_guild_deals(guild_id: int):
-    return [d for d in DEALS_DATA["deals"] if d.get("guild_id") == guild_id]
+    """All deals for this guild in id order. Do not mutate the result."""
+    return _IDX_BY_ID.get(guild_id, {}).values()
 
 
 def _display_name(user_id: int | None, stored_name: str, use_mention: bool = False) -> str:
@@ -109,6 +420,36 @@ def _display_name(user_id: int | None, stored_name: str, use_mention: bool = Fal
     return stored_name or "Unknown"
 
 
+def _chunk_lines(lines, limit: int = 1900):
+    """
+    Yield lines joined into pages of at most limit chars, breaking
+    between lines. A single line longer than limit is cut into
+    limit-sized pieces. lines can be any iterable, so callers can stream
+    rows in.
+    """
+    page = []
+    page_len = 0
+    for line in lines:
+        for start in range(0, max(len(line), 1), limit):
+            piece = line[start : start + limit]
+            if page and page_len + len(piece) + 1 > limit:
+                yield "\n".join(page)
+                page = []
+                page_len = 0
+            page.append(piece)
+            page_len += len(piece) + 1
+    if page:
+        yield "\n".join(page)
+
+
+async def _send_chunked(sink, lines, limit: int = 1900):
+    """Send lines to a channel or ctx, split under Discord's 2000 char limit."""
+    for text in _chunk_lines(lines, limit):
+        # Discord rejects messages that are only whitespace
+        if text.strip():
+            await sink.send(text)
+
+
 def _add_deal(
     guild_id: int,
     setter_id: int | None,
@@ -120,6 +461,7 @@ def _add_deal(
 ):
     deal_id = DEALS_DATA.get("next_id", 1)
     DEALS_DATA["next_id"] = deal_id + 1
+    now = _now_utc()
 
     deal = {
         "id": deal_id,
@@ -129,34 +471,31 @@ def _add_deal(
         "closer_id": closer_id,
         "closer_name": closer_name,
         "customer_name": customer_name,
+        # normalized once here so #cancel/#delete lookups are a dict hit
+        "customer_key": _customer_key(customer_name),
         "kw": float(kw),
         "deal_type": _deal_type(float(kw)),
         "status": "closed",
-        "created_at": _now_utc().isoformat(),
+        "created_at": now.isoformat(),
+        "_ts_us": _to_us(now),
     }
-    DEALS_DATA["deals"].append(deal)
-    _save_deals(DEALS_DATA)
+    _index_add(deal)
+    _append_record({"op": "add", "deal": _public(deal)})
     return deal
 
 
 def _find_deal_by_id(guild_id: int, deal_id: int):
-    for d in _get_guild_deals(guild_id):
-        if d.get("id") == deal_id:
-            return d
-    return None
+    return _IDX_BY_ID.get(guild_id, {}).get(deal_id)
 
 
 def _find_latest_deal_by_customer(guild_id: int, customer_name: str):
-    customer_lower = customer_name.strip().lower()
-    candidates = [
-        d
-        for d in _get_guild_deals(guild_id)
-        if d.get("customer_name", "").strip().lower() == customer_lower
-    ]
-    if not candidates:
-        return None
-    candidates.sort(key=lambda d: d.get("created_at") or "", reverse=True)
-    return candidates[0]
+    """Return the most recent deal for this customer in this guild, or None."""
+    lst = _IDX_BY_CUSTOMER.get(guild_id, {}).get(_customer_key(customer_name))
+    return lst[-1] if lst else None
+
+
+_DELETED = frozenset({"deleted"})
+_DELETED_OR_CANCELED = frozenset({"deleted", "canceled"})
 
 
 def _filter_deals_period(
@@ -165,24 +504,18 @@ def _filter_deals_period(
     end_utc: datetime,
     include_canceled: bool = False,
 ):
-    deals = _get_guild_deals(guild_id)
-    result = []
-    for d in deals:
-        status = d.get("status", "closed")
-        if status == "deleted":
-            continue
-        if not include_canceled and status == "canceled":
-            continue
-        created_raw = d.get("created_at")
-        if not created_raw:
-            continue
-        try:
-            created = datetime.fromisoformat(created_raw)
-        except Exception:
-            continue
-        if start_utc <= created < end_utc:
-            result.append(d)
-    return result
+    times = _IDX_GUILD_TIMES.get(guild_id)
+    if not times:
+        return []
+    lo = bisect_left(times, _to_us(start_utc))
+    hi = bisect_left(times, _to_us(end_utc), lo)
+    # Only the status is left to check per deal; the time range came
+    # from the bisect
+    excluded = _DELETED if include_canceled else _DELETED_OR_CANCELED
+    return [
+        d for d in _IDX_BY_GUILD_TIME[guild_id][lo:hi]
+        if d.get("status", "closed") not in excluded
+    ]
 
 
 def _get_user_deals(guild_id: int, user_id: int, user_name: str):
@@ -190,90 +523,79 @@ def _get_user_deals(guild_id: int, user_id: int, user_name: str):
     Get all deals where user is the closer OR the setter.
     Matches by ID first, then falls back to name matching for setters logged without @mention.
     """
-    deals = []
-    user_name_lower = user_name.lower().strip()
-    
-    for d in _get_guild_deals(guild_id):
-        if d.get("status") in ("canceled", "deleted"):
-            continue
-        
-        # Check if user is the closer (by ID)
-        if d.get("closer_id") == user_id:
-            deals.append(d)
-            continue
-        
-        # Check if user is the setter (by ID)
-        if d.get("setter_id") == user_id:
-            deals.append(d)
-            continue
-        
-        # Fallback: check setter by name (for deals logged without @mention)
-        setter_name = d.get("setter_name", "")
-        if setter_name and setter_name.lower().strip() == user_name_lower:
-            deals.append(d)
-            continue
-    
-    return deals
+    user_name_lower = sys.intern(user_name.lower().strip())
+
+    # Deals where the user is closer or setter by ID, plus deals whose
+    # setter was logged by name (for deals logged without @mention)
+    matched = dict(_IDX_BY_USER.get(guild_id, {}).get(user_id, {}))
+    if user_name_lower:
+        matched.update(_IDX_BY_SETTER_KEY.get(guild_id, {}).get(user_name_lower, {}))
+
+    # Same id order as walking the guild's deals
+    return [
+        d for _, d in sorted(matched.items())
+        if d.get("status") not in _DELETED_OR_CANCELED
+    ]
 
 
 def _get_user_deals_period(guild_id: int, user_id: int, user_name: str, start_utc, end_utc):
     """Get user's deals within a specific time period."""
     all_deals = _get_user_deals(guild_id, user_id, user_name)
     result = []
+    start_us = _to_us(start_utc)
+    end_us = _to_us(end_utc)
     for d in all_deals:
-        created_raw = d.get("created_at")
-        if not created_raw:
-            continue
-        try:
-            created = datetime.fromisoformat(created_raw)
-        except Exception:
-            continue
-        if start_utc <= created < end_utc:
+        # Parsed once when the deal was indexed
+        ts_us = d["_ts_us"]
+        if ts_us is not None and start_us <= ts_us < end_us:
             result.append(d)
     return result
 
 
+# Scoreboard order: deals, then kW
+_rank_key = itemgetter("deals", "kw")
+
+
 def _aggregate_by_role(deals: list[dict], role: str):
     """
     Aggregate deals by closer or setter.
     role = 'closer' or 'setter'
     Returns list of {id, name, deals, kw} sorted by deals desc.
     """
-    stats: dict[str, dict] = {}
+    id_field = f"{role}_id"
+    name_field = f"{role}_name"
+    stats: dict = {}
     for d in deals:
-        uid = d.get(f"{role}_id")
-        name = (d.get(f"{role}_name") or "").strip()
+        name = (d.get(name_field) or "").strip()
         if not name:
             continue
+        uid = d.get(id_field)
         # Use ID as key if available, else lowercase name
-        key = str(uid) if uid else name.lower()
-        if key not in stats:
-            stats[key] = {
-                "id": uid,
-                "name": name,
-                "deals": 0,
-                "kw": 0.0,
-            }
-        stats[key]["deals"] += 1
-        stats[key]["kw"] += float(d.get("kw") or 0.0)
+        key = uid if uid else name.lower()
+        row = stats.get(key)
+        if row is None:
+            stats[key] = {"id": uid, "name": name, "deals": 1, "kw": d["kw"]}
+        else:
+            row["deals"] += 1
+            row["kw"] += d["kw"]
     out = list(stats.values())
-    out.sort(key=lambda x: (x["deals"], x["kw"]), reverse=True)
+    out.sort(key=_rank_key, reverse=True)
     return out
 
 
 def _split_by_type(deals: list[dict]):
-    """Split deals into solar_battery and battery_only lists."""
+    """
+    Split deals into solar_battery and battery_only lists.
+    Also returns the total kW so callers don't need a second pass.
+    """
     solar = []
     battery = []
+    total_kw = 0
     for d in deals:
-        dtype = d.get("deal_type")
-        if dtype is None:
-            dtype = _deal_type(float(d.get("kw") or 0.0))
-        if dtype == "battery_only":
-            battery.append(d)
-        else:
-            solar.append(d)
-    return solar, battery
+        # deal_type is filled in at load for older deals
+        (battery if d["deal_type"] == "battery_only" else solar).append(d)
+        total_kw += d["kw"]
+    return solar, battery, total_kw
 
 
 def _period_bounds(kind: str, base_dt: datetime):
@@ -320,18 +642,13 @@ def _build_section_lines(deals: list[dict], role: str, show_kw: bool = True) ->
     agg = _aggregate_by_role(deals, role)
     if not agg:
         return []
-    lines = []
     label = "Closer :" if role == "closer" else "Setter :"
-    lines.append(label)
-    lines.append("")
-    for row in agg:
-        # Use plain name, NOT mention
-        name = row["name"]
-        if show_kw:
-            lines.append(f"  {name} - {row['deals']} ({row['kw']:.1f} kW)")
-        else:
-            lines.append(f"  {name} - {row['deals']}")
-    return lines
+    # Use plain name, NOT mention
+    if show_kw:
+        rows = [f"  {row['name']} - {row['deals']} ({row['kw']:.1f} kW)" for row in agg]
+    else:
+        rows = [f"  {row['name']} - {row['deals']}" for row in agg]
+    return [label, "", *rows]
 
 
 def _build_leaderboard_content(
@@ -344,56 +661,37 @@ def _build_leaderboard_content(
     NO @mentions - just plain display names.
     Shows kW next to each person.
     """
-    solar_deals, battery_deals = _split_by_type(deals)
+    solar_deals, battery_deals, total_kw = _split_by_type(deals)
 
-    lines = []
-    lines.append(f"{period_label} ⚡")
-    lines.append("")
+    lines = [f"{period_label} ⚡", ""]
 
     if not deals:
         lines.append("_No deals yet — be the first to log a sale with `#sold`!_")
         return "\n".join(lines)
 
-    # --- Solar + Battery section ---
-    if solar_deals:
-        lines.append("Solar + Battery ☀️🔋")
-        lines.append("")
-
-        closer_lines = _build_section_lines(solar_deals, "closer", show_kw=True)
-        if closer_lines:
-            lines.extend(closer_lines)
-            lines.append("")
-
-        setter_lines = _build_section_lines(solar_deals, "setter", show_kw=True)
-        if setter_lines:
-            lines.extend(setter_lines)
-            lines.append("")
-
-    # --- Battery Only section ---
-    if battery_deals:
-        lines.append("Battery Only 🔋")
-        lines.append("")
-
-        closer_lines = _build_section_lines(battery_deals, "closer", show_kw=True)
-        if closer_lines:
-            lines.extend(closer_lines)
-            lines.append("")
-
-        setter_lines = _build_section_lines(battery_deals, "setter", show_kw=True)
-        if setter_lines:
-            lines.extend(setter_lines)
-            lines.append("")
+    # --- Solar + Battery section, then Battery Only ---
+    for heading, section_deals in (
+        ("Solar + Battery ☀️🔋", solar_deals),
+        ("Battery Only 🔋", battery_deals),
+    ):
+        if not section_deals:
+            continue
+        lines += (heading, "")
+        for role in ("closer", "setter"):
+            role_lines = _build_section_lines(section_deals, role, show_kw=True)
+            if role_lines:
+                lines += role_lines
+                lines.append("")
 
     # --- Totals ---
     total_deals = len(deals)
-    total_kw = sum(float(d.get("kw") or 0.0) for d in deals)
-
-    lines.append(f"**Total Transactions Sold:** {total_deals}")
-    lines.append(f"**Total kW Sold:** {total_kw:.2f} kW")
-    lines.append("")
-    lines.append(
-        f"_Commands: type `#sold @Setter kW` in your general chat. "
-        f"Use `!mystats` to see your own numbers._"
+
+    lines += (
+        f"**Total Transactions Sold:** {total_deals}",
+        f"**Total kW Sold:** {total_kw:.2f} kW",
+        "",
+        "_Commands: type `#sold @Setter kW` in your general chat. "
+        "Use `!mystats` to see your own numbers._",
     )
 
     return "\n".join(lines)
@@ -424,7 +722,7 @@ def _build_leaderboard_embed(
         )
         return embed
 
-    solar_deals, battery_deals = _split_by_type(deals)
+    solar_deals, battery_deals, total_kw = _split_by_type(deals)
     medals = ["🥇", "🥈", "🥉"]
 
     def _role_lines(deal_list, role):
@@ -453,7 +751,6 @@ def _build_leaderboard_embed(
             embed.add_field(name="🔋 Battery Only — Setters", value=sl, inline=False)
 
     total_deals = len(deals)
-    total_kw = sum(float(d.get("kw") or 0.0) for d in deals)
     embed.add_field(
         name="Totals",
         value=(
@@ -511,6 +808,40 @@ async def ensure_leaderboard_channels(guild: discord.Guild):
         print(f"[ensure_leaderboard_channels] error in guild {guild.id}: {e}")
 
 
+# Last rendered scoreboard per (guild_id, channel name):
+# (mutation seq, (date label, deal ids), content)
+_rendered_cache: dict[tuple[int, str], tuple[int, tuple, str]] = {}
+
+
+def _board_content(
+    guild_id: int,
+    channel_name: str,
+    start_utc: datetime,
+    end_utc: datetime,
+    period_label: str,
+    date_label: str,
+) -> str:
+    """
+    _build_leaderboard_content for one leaderboard channel, reusing the last
+    render when nothing changed in the guild, or nothing in this period.
+    """
+    seq = _mutation_seq.get(guild_id, 0)
+    cached = _rendered_cache.get((guild_id, channel_name))
+    if cached is not None and cached[0] == seq and cached[1][0] == date_label:
+        return cached[2]
+
+    deals = _filter_deals_period(guild_id, start_utc, end_utc)
+    # A deal's names/kW/type never change once logged, so the same ids
+    # for the same period render the same board
+    key = (date_label, tuple(d["id"] for d in deals))
+    if cached is not None and cached[1] == key:
+        content = cached[2]
+    else:
+        content = _build_leaderboard_content(deals, period_label, date_label)
+    _rendered_cache[(guild_id, channel_name)] = (seq, key, content)
+    return content
+
+
 async def _post_today_leaderboards(guild: discord.Guild):
     """
     Post fresh scoreboards to all three leaderboard channels.
@@ -518,48 +849,86 @@ async def _post_today_leaderboards(guild: discord.Guild):
     """
     now_local = _now_local()
 
-    start_day_utc, end_day_utc, start_day_local, _, _ = _period_bounds("day", now_local)
-    deals_day = _filter_deals_period(guild.id, start_day_utc, end_day_utc)
-
-    start_week_utc, end_week_utc, start_week_local, end_week_local, _ = _period_bounds("week", now_local)
-    deals_week = _filter_deals_period(guild.id, start_week_utc, end_week_utc)
-
-    start_month_utc, end_month_utc, start_month_local, _, _ = _period_bounds("month", now_local)
-    deals_month = _filter_deals_period(guild.id, start_month_utc, end_month_utc)
-
+    # One pass over the guild's channels; first match wins, like discord.utils.get
     channel_map = {}
-    for name in LEADERBOARD_CHANNELS:
-        chan = discord.utils.get(guild.text_channels, name=name)
-        if chan:
-            channel_map[name] = chan
+    for chan in guild.text_channels:
+        if chan.name in LEADERBOARD_CHANNELS:
+            channel_map.setdefault(chan.name, chan)
+
+    posts = []
 
     if "daily-leaderboard" in channel_map:
-        content = _build_leaderboard_content(
-            deals_day,
+        start_day_utc, end_day_utc, start_day_local, _, _ = _period_bounds("day", now_local)
+        content = _board_content(
+            guild.id,
+            "daily-leaderboard",
+            start_day_utc,
+            end_day_utc,
             "Daily Blitz Scoreboard",
             start_day_local.date().isoformat(),
         )
-        await channel_map["daily-leaderboard"].send(content)
+        posts.append((channel_map["daily-leaderboard"], content))
 
     if "weekly-leaderboard" in channel_map:
+        start_week_utc, end_week_utc, start_week_local, end_week_local, _ = _period_bounds("week", now_local)
         week_label = (
             f"{start_week_local.date().isoformat()} → "
             f"{(end_week_local - timedelta(days=1)).date().isoformat()}"
         )
-        content = _build_leaderboard_content(
-            deals_week,
+        content = _board_content(
+            guild.id,
+            "weekly-leaderboard",
+            start_week_utc,
+            end_week_utc,
             "Weekly Blitz Scoreboard",
             week_label,
         )
-        await channel_map["weekly-leaderboard"].send(content)
+        posts.append((channel_map["weekly-leaderboard"], content))
 
     if "monthly-leaderboard" in channel_map:
-        content = _build_leaderboard_content(
-            deals_month,
+        start_month_utc, end_month_utc, start_month_local, _, _ = _period_bounds("month", now_local)
+        content = _board_content(
+            guild.id,
+            "monthly-leaderboard",
+            start_month_utc,
+            end_month_utc,
             "Monthly Blitz Scoreboard",
             start_month_local.date().strftime("%Y-%m"),
         )
-        await channel_map["monthly-leaderboard"].send(content)
+        posts.append((channel_map["monthly-leaderboard"], content))
+
+    # Send all boards at once; one failed channel shouldn't block the others
+    results = await asyncio.gather(
+        *(_send_chunked(chan, text.split("\n")) for chan, text in posts),
+        return_exceptions=True,
+    )
+    for (chan, _), result in zip(posts, results):
+        if isinstance(result, Exception):
+            print(f"[_post_today_leaderboards] error posting to #{chan.name} in guild {guild.id}: {result}")
+
+
+# Deal changes within this many seconds of the first one are folded into
+# a single refresh, so a burst of #sold posts each board once.
+LEADERBOARD_REFRESH_DELAY = 2.0
+_pending_posts: dict[int, asyncio.Task] = {}
+
+
+def _schedule_leaderboard(guild: discord.Guild):
+    """Refresh the leaderboard channels shortly, unless a refresh is already queued."""
+    task = _pending_posts.get(guild.id)
+    if task is not None and not task.done():
+        return
+
+    async def _run():
+        await asyncio.sleep(LEADERBOARD_REFRESH_DELAY)
+        # Changes from here on need a refresh of their own
+        _pending_posts.pop(guild.id, None)
+        try:
+            await _post_today_leaderboards(guild)
+        except Exception as e:
+            print(f"[_post_today_leaderboards] error in guild {guild.id}: {e}")
+
+    _pending_posts[guild.id] = asyncio.create_task(_run())
 
 
 # ---------------------------------------------------------------
@@ -573,334 +942,345 @@ def _is_admin_or_manager(member: discord.Member) -> bool:
 
 
 # ---------------------------------------------------------------
-# Events
+# Hashtag handlers
 # ---------------------------------------------------------------
 
 
-@bot.event
-async def on_ready():
-    print(f"{bot.user} has connected to Discord!")
-    print(f"Guilds: {[g.name for g in bot.guilds]}")
-    for guild in bot.guilds:
-        await ensure_leaderboard_channels(guild)
+_MENTION_RE = re.compile(r"<@!?(\d+)>")
 
 
-@bot.event
-async def on_guild_join(guild: discord.Guild):
-    await ensure_leaderboard_channels(guild)
+# #sold @Setter kW
+# #sold @Setter Customer Name kW
+async def _handle_sold(message: discord.Message, content: str):
+    try:
+        parts = content.split()
+        if len(parts) < 3:
+            raise ValueError
+
+        setter_member = message.mentions[0] if message.mentions else None
+        setter_name = None
+        setter_id = None
+        kw = None
+        customer_name = None
+
+        if setter_member:
+            m = _MENTION_RE.search(content)
+            if m is None:
+                raise ValueError
+            rest = content[m.end():].split()
+            if not rest:
+                raise ValueError
+            kw = float(rest[-1])
+            customer_tokens = rest[:-1]
+            customer_name = " ".join(customer_tokens) if customer_tokens else None
+            setter_id = setter_member.id
+            setter_name = setter_member.display_name
+        else:
+            kw_token = parts[-1]
+            kw = float(kw_token)
+            setter_name = parts[1]
+            setter_id = None
+            customer_tokens = parts[2:-1]
+            customer_name = " ".join(customer_tokens) if customer_tokens else None
 
+        closer_member = message.author
+        closer_name = closer_member.display_name
+
+        deal = _add_deal(
+            guild_id=message.guild.id,
+            setter_id=setter_id,
+            setter_name=setter_name,
+            closer_id=closer_member.id,
+            closer_name=closer_name,
+            customer_name=customer_name or "N/A",
+            kw=kw,
+        )
 
-@bot.event
-async def on_message(message: discord.Message):
-    if message.author.bot:
-        return
+        dtype_label = _deal_type_label(deal["deal_type"])
 
-    if (
-        isinstance(message.channel, discord.TextChannel)
-        and message.channel.name in LEADERBOARD_CHANNELS
-    ):
-        await bot.process_commands(message)
-        return
+        # Deal confirmation DOES use @mentions
+        embed = discord.Embed(
+            title="🎉 DEAL CLOSED!",
+            color=0x2ecc71,
+            description=(
+                f"Deal for {_display_name(setter_id, setter_name, use_mention=True)} has been logged!"
+            ),
+        )
+        embed.add_field(
+            name="💼 Closer",
+            value=_display_name(closer_member.id, closer_name, use_mention=True),
+            inline=True,
+        )
+        embed.add_field(
+            name="Setter",
+            value=_display_name(setter_id, setter_name, use_mention=True),
+            inline=True,
+        )
+        embed.add_field(name="⚡ System Size", value=f"{deal['kw']:.1f} kW", inline=True)
+        embed.add_field(name="Type", value=dtype_label, inline=True)
+        if customer_name and customer_name != "N/A":
+            embed.add_field(name="Customer", value=deal["customer_name"], inline=True)
+        embed.set_footer(text=f"Deal #{deal['id']}")
+
+        await message.channel.send(embed=embed)
+        _schedule_leaderboard(message.guild)
+
+    except ValueError:
+        await message.channel.send(
+            "❌ Invalid `#sold` format.\n"
+            "Use: `#sold @Setter kW`\n"
+            "Example: `#sold @Devin 6.5`\n"
+            "Battery only: `#sold @Devin 0`"
+        )
+    except Exception as e:
+        await message.channel.send(f"❌ Error processing sale: {e}")
 
-    # Need a guild for # commands
-    if not message.guild:
-        await bot.process_commands(message)
+
+# #soldfor @Closer @Setter kW   (admin only — log deal for someone else)
+# #soldfor @Closer @Setter Customer Name kW
+async def _handle_soldfor(message: discord.Message, content: str):
+    if not _is_admin_or_manager(message.author):
+        await message.channel.send("⛔ Only admins or managers can use `#soldfor`.")
         return
 
-    content = message.content.strip()
-    lower = content.lower()
+    try:
+        parts = content.split()
+        # Need at least: #soldfor @Closer @Setter kW
+        if len(parts) < 4:
+            raise ValueError
+
+        mentions = message.mentions
+        if len(mentions) < 2:
+            raise ValueError("Need two @mentions: closer and setter")
+
+        # Everything after the second mention is [customer...] kW
+        mention_matches = list(_MENTION_RE.finditer(content))
+        if len(mention_matches) < 2:
+            raise ValueError
+
+        closer_member = mentions[0]
+        setter_member = mentions[1]
+
+        rest = content[mention_matches[1].end():].split()
+        if not rest:
+            raise ValueError
+        kw = float(rest[-1])
+
+        customer_tokens = rest[:-1]
+        customer_name = " ".join(customer_tokens) if customer_tokens else None
+
+        deal = _add_deal(
+            guild_id=message.guild.id,
+            setter_id=setter_member.id,
+            setter_name=setter_member.display_name,
+            closer_id=closer_member.id,
+            closer_name=closer_member.display_name,
+            customer_name=customer_name or "N/A",
+            kw=kw,
+        )
 
-    # ----------------------------------------------------------------
-    # #sold @Setter kW
-    # #sold @Setter Customer Name kW
-    # ----------------------------------------------------------------
-    if lower.startswith("#sold") and not lower.startswith("#soldfor"):
-        try:
-            parts = content.split()
-            if len(parts) < 3:
-                raise ValueError
+        dtype_label = _deal_type_label(deal["deal_type"])
 
-            setter_member = message.mentions[0] if message.mentions else None
-            setter_name = None
-            setter_id = None
-            kw = None
-            customer_name = None
-
-            if setter_member:
-                mention_token = None
-                for p in parts:
-                    if p.startswith("<@") and p.endswith(">"):
-                        mention_token = p
-                        break
-                if mention_token is None:
-                    raise ValueError
-                idx = parts.index(mention_token)
-                if len(parts) - idx < 2:
-                    raise ValueError
-                kw_token = parts[-1]
-                kw = float(kw_token)
-                customer_tokens = parts[idx + 1 : -1]
-                customer_name = " ".join(customer_tokens) if customer_tokens else None
-                setter_id = setter_member.id
-                setter_name = setter_member.display_name
-            else:
-                kw_token = parts[-1]
-                kw = float(kw_token)
-                setter_name = parts[1]
-                setter_id = None
-                customer_tokens = parts[2:-1]
-                customer_name = " ".join(customer_tokens) if customer_tokens else None
-
-            closer_member = message.author
-            closer_name = closer_member.display_name
-
-            deal = _add_deal(
-                guild_id=message.guild.id,
-                setter_id=setter_id,
-                setter_name=setter_name,
-                closer_id=closer_member.id,
-                closer_name=closer_name,
-                customer_name=customer_name or "N/A",
-                kw=kw,
-            )
+        # Deal confirmation DOES use @mentions
+        embed = discord.Embed(
+            title="🎉 DEAL CLOSED! (logged by admin)",
+            color=0x2ecc71,
+            description=(
+                f"Deal logged by {message.author.display_name} "
+                f"for {_display_name(closer_member.id, closer_member.display_name, use_mention=True)}"
+            ),
+        )
+        embed.add_field(
+            name="💼 Closer",
+            value=_display_name(closer_member.id, closer_member.display_name, use_mention=True),
+            inline=True,
+        )
+        embed.add_field(
+            name="Setter",
+            value=_display_name(setter_member.id, setter_member.display_name, use_mention=True),
+            inline=True,
+        )
+        embed.add_field(name="⚡ System Size", value=f"{deal['kw']:.1f} kW", inline=True)
+        embed.add_field(name="Type", value=dtype_label, inline=True)
+        if customer_name and customer_name != "N/A":
+            embed.add_field(name="Customer", value=deal["customer_name"], inline=True)
+        embed.set_footer(text=f"Deal #{deal['id']}")
+
+        await message.channel.send(embed=embed)
+        _schedule_leaderboard(message.guild)
+
+    except ValueError:
+        await message.channel.send(
+            "❌ Invalid `#soldfor` format.\n"
+            "Use: `#soldfor @Closer @Setter kW`\n"
+            "Example: `#soldfor @Ethen @Devin 6.5`\n"
+            "With customer: `#soldfor @Ethen @Devin John Smith 6.5`\n"
+            "Battery only: `#soldfor @Ethen @Devin 0`"
+        )
+    except Exception as e:
+        await message.channel.send(f"❌ Error processing sale: {e}")
 
-            dtype_label = _deal_type_label(deal["deal_type"])
 
-            # Deal confirmation DOES use @mentions
-            embed = discord.Embed(
-                title="🎉 DEAL CLOSED!",
-                color=0x2ecc71,
-                description=(
-                    f"Deal for {_display_name(setter_id, setter_name, use_mention=True)} has been logged!"
-                ),
-            )
-            embed.add_field(
-                name="💼 Closer",
-                value=_display_name(closer_member.id, closer_name, use_mention=True),
-                inline=True,
-            )
+# #cancel Customer Name
+async def _handle_cancel(message: discord.Message, content: str):
+    try:
+        parts = content.split(maxsplit=1)
+        if len(parts) < 2:
+            raise ValueError
+        customer_name = parts[1].strip()
+        deal = _find_latest_deal_by_customer(message.guild.id, customer_name)
+        if not deal:
+            await message.channel.send(f"❌ No deal found for customer `{customer_name}`.")
+            return
+
+        if deal.get("status") == "canceled":
+            await message.channel.send(f"ℹ️ Latest deal for `{customer_name}` is already canceled.")
+            return
+
+        deal["status"] = "canceled"
+        deal["canceled_at"] = _now_utc().isoformat()
+        _note_change(message.guild.id)
+        _append_record({"op": "cancel", "id": deal["id"], "canceled_at": deal["canceled_at"]})
+
+        embed = discord.Embed(
+            title="⚠️ Deal Canceled",
+            color=0xe67e22,
+            description=f"Customer: **{deal['customer_name']}**",
+        )
+        embed.add_field(
+            name="Closer",
+            value=_display_name(deal.get("closer_id"), deal.get("closer_name", "Unknown")),
+            inline=True,
+        )
+        if deal.get("setter_name"):
             embed.add_field(
                 name="Setter",
-                value=_display_name(setter_id, setter_name, use_mention=True),
+                value=_display_name(deal.get("setter_id"), deal["setter_name"]),
                 inline=True,
             )
-            embed.add_field(name="⚡ System Size", value=f"{deal['kw']:.1f} kW", inline=True)
-            embed.add_field(name="Type", value=dtype_label, inline=True)
-            if customer_name and customer_name != "N/A":
-                embed.add_field(name="Customer", value=deal["customer_name"], inline=True)
-            embed.set_footer(text=f"Deal #{deal['id']}")
-
-            await message.channel.send(embed=embed)
-            await _post_today_leaderboards(message.guild)
-
-        except ValueError:
-            await message.channel.send(
-                "❌ Invalid `#sold` format.\n"
-                "Use: `#sold @Setter kW`\n"
-                "Example: `#sold @Devin 6.5`\n"
-                "Battery only: `#sold @Devin 0`"
-            )
-        except Exception as e:
-            await message.channel.send(f"❌ Error processing sale: {e}")
+        embed.add_field(name="System Size", value=f"{deal['kw']:.1f} kW", inline=True)
+        embed.set_footer(text=f"Deal #{deal['id']}")
+        await message.channel.send(embed=embed)
+        _schedule_leaderboard(message.guild)
+
+    except ValueError:
+        await message.channel.send("❌ Use: `#cancel Customer Name`")
+    except Exception as e:
+        await message.channel.send(f"❌ Error: {e}")
+
+
+# #delete <ID>  or  #delete Customer Name   (admin/manager only)
+async def _handle_delete(message: discord.Message, content: str):
+    if not _is_admin_or_manager(message.author):
+        await message.channel.send("⛔ Only admins or managers can delete deals.")
         return
 
-    # ----------------------------------------------------------------
-    # #soldfor @Closer @Setter kW   (admin only — log deal for someone else)
-    # #soldfor @Closer @Setter Customer Name kW
-    # ----------------------------------------------------------------
-    if lower.startswith("#soldfor"):
-        if not _is_admin_or_manager(message.author):
-            await message.channel.send("⛔ Only admins or managers can use `#soldfor`.")
-            return
+    try:
+        parts = content.split(maxsplit=1)
+        if len(parts) < 2:
+            raise ValueError
+        target = parts[1].strip()
 
+        deal = None
+        # Try to parse as deal ID first
         try:
-            parts = content.split()
-            # Need at least: #soldfor @Closer @Setter kW
-            if len(parts) < 4:
-                raise ValueError
+            deal_id = int(target)
+            deal = _find_deal_by_id(message.guild.id, deal_id)
+            if not deal:
+                await message.channel.send(f"❌ No deal found with ID `{deal_id}`.")
+                return
+        except (ValueError, TypeError):
+            # Not a number — treat as customer name
+            deal = _find_latest_deal_by_customer(message.guild.id, target)
+            if not deal:
+                await message.channel.send(f"❌ No deal found for `{target}`.")
+                return
 
-            mentions = message.mentions
-            if len(mentions) < 2:
-                raise ValueError("Need two @mentions: closer and setter")
+        deal_info = (
+            f"Deal #{deal['id']} — "
+            f"Closer: {deal.get('closer_name', '?')}, "
+            f"Setter: {deal.get('setter_name', '?')}, "
+            f"{deal['kw']:.1f} kW"
+        )
 
-            # Find the mention tokens in order
-            mention_tokens = [p for p in parts if p.startswith("<@") and p.endswith(">")]
-            if len(mention_tokens) < 2:
-                raise ValueError
+        _index_remove(deal)
+        _append_record({"op": "delete", "id": deal["id"]})
 
-            closer_member = mentions[0]
-            setter_member = mentions[1]
+        await message.channel.send(f"🗑️ Deleted: {deal_info}")
+        _schedule_leaderboard(message.guild)
 
-            # Find position after second mention
-            second_mention_idx = parts.index(mention_tokens[1])
+    except ValueError:
+        await message.channel.send("❌ Use: `#delete <DealID>` or `#delete Customer Name`")
+    except Exception as e:
+        await message.channel.send(f"❌ Error: {e}")
 
-            kw_token = parts[-1]
-            kw = float(kw_token)
 
-            customer_tokens = parts[second_mention_idx + 1 : -1]
-            customer_name = " ".join(customer_tokens) if customer_tokens else None
+# #clearleaderboard   (admin/manager only)
+async def _handle_clearleaderboard(message: discord.Message, content: str):
+    if not _is_admin_or_manager(message.author):
+        await message.channel.send("⛔ Only admins or managers can clear the leaderboard.")
+        return
 
-            deal = _add_deal(
-                guild_id=message.guild.id,
-                setter_id=setter_member.id,
-                setter_name=setter_member.display_name,
-                closer_id=closer_member.id,
-                closer_name=closer_member.display_name,
-                customer_name=customer_name or "N/A",
-                kw=kw,
-            )
+    _index_drop_guild(message.guild.id)
+    _append_record({"op": "clear", "guild_id": message.guild.id})
+    await message.channel.send("🔥 All deals for this server have been cleared. Fresh start!")
+    _schedule_leaderboard(message.guild)
 
-            dtype_label = _deal_type_label(deal["deal_type"])
 
-            # Deal confirmation DOES use @mentions
-            embed = discord.Embed(
-                title="🎉 DEAL CLOSED! (logged by admin)",
-                color=0x2ecc71,
-                description=(
-                    f"Deal logged by {message.author.display_name} "
-                    f"for {_display_name(closer_member.id, closer_member.display_name, use_mention=True)}"
-                ),
-            )
-            embed.add_field(
-                name="💼 Closer",
-                value=_display_name(closer_member.id, closer_member.display_name, use_mention=True),
-                inline=True,
-            )
-            embed.add_field(
-                name="Setter",
-                value=_display_name(setter_member.id, setter_member.display_name, use_mention=True),
-                inline=True,
-            )
-            embed.add_field(name="⚡ System Size", value=f"{deal['kw']:.1f} kW", inline=True)
-            embed.add_field(name="Type", value=dtype_label, inline=True)
-            if customer_name and customer_name != "N/A":
-                embed.add_field(name="Customer", value=deal["customer_name"], inline=True)
-            embed.set_footer(text=f"Deal #{deal['id']}")
-
-            await message.channel.send(embed=embed)
-            await _post_today_leaderboards(message.guild)
-
-        except ValueError:
-            await message.channel.send(
-                "❌ Invalid `#soldfor` format.\n"
-                "Use: `#soldfor @Closer @Setter kW`\n"
-                "Example: `#soldfor @Ethen @Devin 6.5`\n"
-                "With customer: `#soldfor @Ethen @Devin John Smith 6.5`\n"
-                "Battery only: `#soldfor @Ethen @Devin 0`"
-            )
-        except Exception as e:
-            await message.channel.send(f"❌ Error processing sale: {e}")
-        return
+_HASHTAG_HANDLERS = {
+    "#sold": _handle_sold,
+    "#soldfor": _handle_soldfor,
+    "#cancel": _handle_cancel,
+    "#delete": _handle_delete,
+    "#clearleaderboard": _handle_clearleaderboard,
+}
 
-    # ----------------------------------------------------------------
-    # #cancel Customer Name
-    # ----------------------------------------------------------------
-    if lower.startswith("#cancel"):
-        try:
-            parts = content.split(maxsplit=1)
-            if len(parts) < 2:
-                raise ValueError
-            customer_name = parts[1].strip()
-            deal = _find_latest_deal_by_customer(message.guild.id, customer_name)
-            if not deal:
-                await message.channel.send(f"❌ No deal found for customer `{customer_name}`.")
-                return
 
-            if deal.get("status") == "canceled":
-                await message.channel.send(f"ℹ️ Latest deal for `{customer_name}` is already canceled.")
-                return
+# ---------------------------------------------------------------
+# Events
+# ---------------------------------------------------------------
 
-            deal["status"] = "canceled"
-            deal["canceled_at"] = _now_utc().isoformat()
-            _save_deals(DEALS_DATA)
 
-            embed = discord.Embed(
-                title="⚠️ Deal Canceled",
-                color=0xe67e22,
-                description=f"Customer: **{deal['customer_name']}**",
-            )
-            embed.add_field(
-                name="Closer",
-                value=_display_name(deal.get("closer_id"), deal.get("closer_name", "Unknown")),
-                inline=True,
-            )
-            if deal.get("setter_name"):
-                embed.add_field(
-                    name="Setter",
-                    value=_display_name(deal.get("setter_id"), deal["setter_name"]),
-                    inline=True,
-                )
-            embed.add_field(name="System Size", value=f"{deal['kw']:.1f} kW", inline=True)
-            embed.set_footer(text=f"Deal #{deal['id']}")
-            await message.channel.send(embed=embed)
-            await _post_today_leaderboards(message.guild)
-
-        except ValueError:
-            await message.channel.send("❌ Use: `#cancel Customer Name`")
-        except Exception as e:
-            await message.channel.send(f"❌ Error: {e}")
-        return
+@bot.event
+async def on_ready():
+    print(f"{bot.user} has connected to Discord!")
+    print(f"Guilds: {[g.name for g in bot.guilds]}")
+    for guild in bot.guilds:
+        await ensure_leaderboard_channels(guild)
 
-    # ----------------------------------------------------------------
-    # #delete <ID>  or  #delete Customer Name   (admin/manager only)
-    # ----------------------------------------------------------------
-    if lower.startswith("#delete"):
-        if not _is_admin_or_manager(message.author):
-            await message.channel.send("⛔ Only admins or managers can delete deals.")
-            return
 
-        try:
-            parts = content.split(maxsplit=1)
-            if len(parts) < 2:
-                raise ValueError
-            target = parts[1].strip()
-
-            deal = None
-            # Try to parse as deal ID first
-            try:
-                deal_id = int(target)
-                deal = _find_deal_by_id(message.guild.id, deal_id)
-                if not deal:
-                    await message.channel.send(f"❌ No deal found with ID `{deal_id}`.")
-                    return
-            except (ValueError, TypeError):
-                # Not a number — treat as customer name
-                deal = _find_latest_deal_by_customer(message.guild.id, target)
-                if not deal:
-                    await message.channel.send(f"❌ No deal found for `{target}`.")
-                    return
-
-            deal_info = (
-                f"Deal #{deal['id']} — "
-                f"Closer: {deal.get('closer_name', '?')}, "
-                f"Setter: {deal.get('setter_name', '?')}, "
-                f"{deal['kw']:.1f} kW"
-            )
+@bot.event
+async def on_guild_join(guild: discord.Guild):
+    await ensure_leaderboard_channels(guild)
 
-            DEALS_DATA["deals"] = [d for d in DEALS_DATA["deals"] if d["id"] != deal["id"]]
-            _save_deals(DEALS_DATA)
 
-            await message.channel.send(f"🗑️ Deleted: {deal_info}")
-            await _post_today_leaderboards(message.guild)
+@bot.event
+async def on_message(message: discord.Message):
+    if message.author.bot:
+        return
 
-        except ValueError:
-            await message.channel.send("❌ Use: `#delete <DealID>` or `#delete Customer Name`")
-        except Exception as e:
-            await message.channel.send(f"❌ Error: {e}")
+    if (
+        isinstance(message.channel, discord.TextChannel)
+        and message.channel.name in LEADERBOARD_CHANNELS
+    ):
+        await bot.process_commands(message)
         return
 
-    # ----------------------------------------------------------------
-    # #clearleaderboard   (admin/manager only)
-    # ----------------------------------------------------------------
-    if lower.startswith("#clearleaderboard"):
-        if not _is_admin_or_manager(message.author):
-            await message.channel.send("⛔ Only admins or managers can clear the leaderboard.")
-            return
+    # Need a guild for # commands
+    if not message.guild:
+        await bot.process_commands(message)
+        return
 
-        DEALS_DATA["deals"] = [d for d in DEALS_DATA["deals"] if d.get("guild_id") != message.guild.id]
-        _save_deals(DEALS_DATA)
-        await message.channel.send("🔥 All deals for this server have been cleared. Fresh start!")
-        await _post_today_leaderboards(message.guild)
+    content = message.content.strip()
+    if not content.startswith("#"):
+        await bot.process_commands(message)
+        return
+
+    # Only the first token picks the handler, so "#soldfor" can't be
+    # mistaken for "#sold"
+    handler = _HASHTAG_HANDLERS.get(content.split(None, 1)[0].lower())
+    if handler is not None:
+        await handler(message, content)
         return
 
     await bot.process_commands(message)
@@ -910,6 +1290,30 @@ async def on_message(message: discord.Message):
 # Slash-style ! commands
 # ---------------------------------------------------------------
 
+# Periods each command accepts
+_PERIODS_DEALS = frozenset({"day", "week", "month", "today", "thisweek", "thismonth", "all"})
+_PERIODS_LEADERBOARD = frozenset({"day", "week", "month", "today", "thisweek", "thismonth"})
+_PERIODS_MYSTATS = frozenset({"day", "today", "week", "thisweek", "month", "thismonth", "alltime", "all"})
+
+
+# ID | Type | Closer | Setter | kW | Status
+_DEAL_ROW_FMT = "`{:<4}| {:<8} | {:<14} | {:<14} | {:<5.1f} | {}`".format
+_STATUS_EMOJI = {"closed": "✅", "canceled": "❌", "deleted": "🗑️"}
+_TYPE_SHORT = {"solar_battery": "Solar"}
+
+
+def _deal_table_row(d: dict) -> str:
+    """One row of the !deals table."""
+    status = d.get("status", "closed")
+    return _DEAL_ROW_FMT(
+        d["id"],
+        _TYPE_SHORT.get(d.get("deal_type", "solar_battery"), "Batt"),
+        (d.get("closer_name") or "?")[:14],
+        (d.get("setter_name") or "?")[:14],
+        d["kw"],
+        _STATUS_EMOJI.get(status, status),
+    )
+
 
 @bot.command(name="deals")
 async def deals_cmd(ctx: commands.Context, period: str = "day", date_str: str | None = None):
@@ -922,7 +1326,7 @@ async def deals_cmd(ctx: commands.Context, period: str = "day", date_str: str |
         return
 
     period = period.lower()
-    if period not in {"day", "week", "month", "today", "thisweek", "thismonth", "all"}:
+    if period not in _PERIODS_DEALS:
         await ctx.send("❌ Use: `!deals [day|week|month|all]`")
         return
 
@@ -956,35 +1360,14 @@ async def deals_cmd(ctx: commands.Context, period: str = "day", date_str: str |
         await ctx.send(f"No deals found for **{date_label}**.")
         return
 
-    # Build a compact table
-    lines = [f"**{pretty}** — {date_label}\n"]
-    lines.append("`ID  | Type     | Closer         | Setter         | kW    | Status`")
-    lines.append("`----|----------|----------------|----------------|-------|--------`")
-
-    for d in guild_deals:
-        did = d["id"]
-        dtype = "Solar" if d.get("deal_type", "solar_battery") == "solar_battery" else "Batt"
-        closer = (d.get("closer_name") or "?")[:14]
-        setter = (d.get("setter_name") or "?")[:14]
-        kw = f"{d['kw']:.1f}"
-        status = d.get("status", "closed")
-        status_short = {"closed": "✅", "canceled": "❌", "deleted": "🗑️"}.get(status, status)
-        lines.append(f"`{did:<4}| {dtype:<8} | {closer:<14} | {setter:<14} | {kw:<5} | {status_short}`")
-
-    # Discord messages have a 2000 char limit
-    msg = "\n".join(lines)
-    if len(msg) > 1900:
-        # Send in chunks
-        chunk = ""
-        for line in lines:
-            if len(chunk) + len(line) + 1 > 1900:
-                await ctx.send(chunk)
-                chunk = ""
-            chunk += line + "\n"
-        if chunk:
-            await ctx.send(chunk)
-    else:
-        await ctx.send(msg)
+    # Build a compact table; rows are streamed into _send_chunked, which
+    # pages them under Discord's message limit
+    header = [
+        f"**{pretty}** — {date_label}\n",
+        "`ID  | Type     | Closer         | Setter         | kW    | Status`",
+        "`----|----------|----------------|----------------|-------|--------`",
+    ]
+    await _send_chunked(ctx, chain(header, map(_deal_table_row, guild_deals)))
 
 
 @bot.command(name="leaderboard")
@@ -1003,7 +1386,7 @@ async def leaderboard_cmd(ctx: commands.Context, period: str = "day", date_str:
         return
 
     period = period.lower()
-    if period not in {"day", "week", "month", "today", "thisweek", "thismonth"}:
+    if period not in _PERIODS_LEADERBOARD:
         await ctx.send("❌ Invalid period. Use: `day`, `week`, `month`.")
         return
 
@@ -1043,7 +1426,7 @@ async def mystats_cmd(ctx: commands.Context, period: str = "alltime"):
         return
 
     period = period.lower()
-    if period not in {"day", "today", "week", "thisweek", "month", "thismonth", "alltime", "all"}:
+    if period not in _PERIODS_MYSTATS:
         await ctx.send("❌ Use: `!mystats [day|week|month|alltime]`")
         return
 
@@ -1067,14 +1450,27 @@ async def mystats_cmd(ctx: commands.Context, period: str = "alltime"):
         else:  # month
             period_label = f"This Month ({start_local.strftime('%Y-%m')})"
 
+    # One pass for the totals, the closer/setter split and the type split
     total_deals = len(deals)
-    total_kw = sum(float(d.get("kw") or 0.0) for d in deals)
-    solar_deals, battery_deals = _split_by_type(deals)
-
-    # Count deals where user was closer vs setter
-    closer_deals = [d for d in deals if d.get("closer_id") == user_id]
-    setter_deals = [d for d in deals if d.get("setter_id") == user_id or
-                   (d.get("setter_name", "").lower().strip() == user_name.lower().strip() and d.get("closer_id") != user_id)]
+    total_kw = closer_kw = setter_kw = 0
+    closer_n = setter_n = solar_n = battery_n = 0
+    user_name_lower = user_name.lower().strip()
+    for d in deals:
+        kw = d["kw"]
+        total_kw += kw
+        is_closer = d.get("closer_id") == user_id
+        if is_closer:
+            closer_n += 1
+            closer_kw += kw
+        if d.get("setter_id") == user_id or (
+            not is_closer and d["_setter_key"] == user_name_lower
+        ):
+            setter_n += 1
+            setter_kw += kw
+        if d["deal_type"] == "battery_only":
+            battery_n += 1
+        else:
+            solar_n += 1
 
     embed = discord.Embed(
         title=f"📊 Stats for {ctx.author.display_name}",
@@ -1085,18 +1481,16 @@ async def mystats_cmd(ctx: commands.Context, period: str = "alltime"):
     embed.add_field(name="Total kW", value=f"{total_kw:.1f}", inline=True)
     embed.add_field(name="\u200b", value="\u200b", inline=True)  # Spacer
 
-    if closer_deals:
-        closer_kw = sum(float(d.get("kw") or 0.0) for d in closer_deals)
-        embed.add_field(name="💼 As Closer", value=f"{len(closer_deals)} deals ({closer_kw:.1f} kW)", inline=True)
+    if closer_n:
+        embed.add_field(name="💼 As Closer", value=f"{closer_n} deals ({closer_kw:.1f} kW)", inline=True)
 
-    if setter_deals:
-        setter_kw = sum(float(d.get("kw") or 0.0) for d in setter_deals)
-        embed.add_field(name="📋 As Setter", value=f"{len(setter_deals)} deals ({setter_kw:.1f} kW)", inline=True)
+    if setter_n:
+        embed.add_field(name="📋 As Setter", value=f"{setter_n} deals ({setter_kw:.1f} kW)", inline=True)
 
-    if solar_deals:
-        embed.add_field(name="☀️🔋 Solar+Battery", value=str(len(solar_deals)), inline=True)
-    if battery_deals:
-        embed.add_field(name="🔋 Battery Only", value=str(len(battery_deals)), inline=True)
+    if solar_n:
+        embed.add_field(name="☀️🔋 Solar+Battery", value=str(solar_n), inline=True)
+    if battery_n:
+        embed.add_field(name="🔋 Battery Only", value=str(battery_n), inline=True)
 
     embed.set_footer(text="Usage: !mystats [day|week|month|alltime]")
     await ctx.send(embed=embed)
@@ -1162,8 +1556,7 @@ async def setup_channels_cmd(ctx: commands.Context):
         await ctx.send(f"❌ Error creating channels: {e}")
 
 
-@bot.command(name="help")
-async def help_cmd(ctx: commands.Context):
+def _build_help_embed() -> discord.Embed:
     embed = discord.Embed(
         title="☀️ Solar Leaderboard Bot – Commands",
         color=0x95a5a6,
@@ -1225,7 +1618,16 @@ async def help_cmd(ctx: commands.Context):
     )
 
     embed.set_footer(text="Leaderboard channels are read-only – use #sold in your normal chat.")
-    await ctx.send(embed=embed)
+    return embed
+
+
+# The help text never changes, so build it once
+_HELP_EMBED = _build_help_embed()
+
+
+@bot.command(name="help")
+async def help_cmd(ctx: commands.Context):
+    await ctx.send(embed=_HELP_EMBED)
 
 
 # ---------------------------------------------------------------
@@ -1238,3 +1640,4 @@ if __name__ == "__main__":
         print("Error: DISCORD_BOT_TOKEN environment variable is not set.")
     else:
         bot.run(token)
+        _drain_log_queue()
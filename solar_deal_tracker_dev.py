@@ -1,14 +1,21 @@
 import os
-import json
 import csv
 import asyncio
+import heapq
+import re
+import sys
+from bisect import bisect_left, insort
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 from typing import Dict, Any, List, Optional
 
 import discord
-from discord.ext import commands
+import orjson
+from discord.ext import commands, tasks
 
 # ------------------------
 # Timezone
@@ -38,6 +45,11 @@ os.makedirs(DATA_DIR, exist_ok=True)
 
 DEALS_FILE = os.path.join(DATA_DIR, "deals.json")
 CONFIG_FILE = os.path.join(DATA_DIR, "server_config.json")
+# Deal changes are appended here and folded into DEALS_FILE by snapshot_task
+DEALS_WAL = os.path.join(DATA_DIR, "deals_wal.log")
+
+# One worker so WAL appends and snapshots hit the disk in submission order
+_IO_EXECUTOR = ThreadPoolExecutor(max_workers=1)
 
 # Loss reasons for no-sale
 LOSS_REASONS = {
@@ -56,27 +68,140 @@ LOSS_REASON_LABELS = {
     "other": "Other / Misc",
 }
 
+# Embed colours (discord.Color.* builds a new object per call)
+GREEN = discord.Color.green()
+GOLD = discord.Color.gold()
+ORANGE = discord.Color.orange()
+
+
+def _apply_wal_entry(data: dict, entry: dict):
+    """Replay one WAL record onto the loaded deals data."""
+    op = entry.get("op")
+    deals = data["deals"]
+    if op == "put":
+        deal = entry["deal"]
+        for i, d in enumerate(deals):
+            if d["id"] == deal["id"]:
+                deals[i] = deal
+                break
+        else:
+            deals.append(deal)
+        data["next_id"] = max(data["next_id"], deal["id"] + 1)
+    elif op == "delete":
+        data["deals"] = [d for d in deals if d["id"] != entry["id"]]
+    elif op == "clear":
+        data["deals"] = [d for d in deals if d.get("guild_id") != entry["guild_id"]]
 
-def _load_deals():
-    if not os.path.exists(DEALS_FILE):
-        return {"next_id": 1, "deals": []}
+
+def _iso_to_ts(value: Optional[str]) -> Optional[int]:
+    if not value:
+        return None
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
     try:
-        with open(DEALS_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        if "next_id" not in data:
-            data["next_id"] = 1
-        if "deals" not in data:
-            data["deals"] = []
-        return data
+        return int(datetime.fromisoformat(value).timestamp())
     except Exception:
-        return {"next_id": 1, "deals": []}
+        return None
+
+
+@lru_cache(maxsize=4096)
+def _customer_key(customer_name: str) -> str:
+    """Normalized customer name used for lookups; reps retype the same names a lot."""
+    return customer_name.strip().lower()
+
+
+def _backfill_ts(d: dict) -> bool:
+    """Add fields that older deals were saved without. Returns True if any were added."""
+    changed = False
+    if "created_ts" not in d:
+        d["created_ts"] = _iso_to_ts(d.get("created_at"))
+        changed = True
+    if "closed_ts" not in d:
+        d["closed_ts"] = _iso_to_ts(d.get("closed_at"))
+        changed = True
+    if "customer_key" not in d:
+        d["customer_key"] = _customer_key(d.get("customer_name") or "")
+        changed = True
+    return changed
+
+
+def _deal_ts(d: dict) -> Optional[int]:
+    """closed_ts for sold deals, created_ts for others."""
+    return d.get("closed_ts") or d.get("created_ts")
+
+
+def _load_deals():
+    data = {"next_id": 1, "deals": []}
+    if os.path.exists(DEALS_FILE):
+        try:
+            with open(DEALS_FILE, "rb") as f:
+                data = orjson.loads(f.read())
+            if "next_id" not in data:
+                data["next_id"] = 1
+            if "deals" not in data:
+                data["deals"] = []
+        except Exception:
+            data = {"next_id": 1, "deals": []}
+
+    if os.path.exists(DEALS_WAL):
+        with open(DEALS_WAL, "rb") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    _apply_wal_entry(data, orjson.loads(line))
+                except Exception:
+                    # Torn final record from a crash mid-append
+                    break
+    return data
+
+
+def _append_wal(line: bytes):
+    with open(DEALS_WAL, "ab") as f:
+        f.write(line)
+
+
+def _write_atomic(path: str, payload: bytes):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(payload)
+    os.replace(tmp, path)
+
+
+def _write_snapshot(payload: bytes):
+    """Replace DEALS_FILE with an already-serialized snapshot and reset the WAL."""
+    _write_atomic(DEALS_FILE, payload)
+    open(DEALS_WAL, "w").close()
+
+
+# Latest serialized state per path still waiting for the IO worker
+_pending_writes: Dict[str, bytes] = {}
+
+
+def _flush_pending(path: str):
+    payload = _pending_writes.pop(path, None)
+    if payload is not None:
+        _write_atomic(path, payload)
+
+
+async def _save_json_async(path: str, data) -> None:
+    """
+    Write `data` to `path` on the IO worker. Saves that pile up behind each
+    other collapse into one write of the newest state.
+    """
+    _pending_writes[path] = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    await asyncio.get_running_loop().run_in_executor(_IO_EXECUTOR, _flush_pending, path)
+
 
+_wal_records = 0
 
-def _save_deals(data):
-    tmp = DEALS_FILE + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
-    os.replace(tmp, DEALS_FILE)
+
+async def _log_deal_change(delta: Dict[str, Any]) -> None:
+    """Append one change record to the WAL instead of rewriting DEALS_FILE."""
+    global _wal_records
+    _wal_records += 1
+    line = orjson.dumps(delta) + b"\n"
+    await asyncio.get_running_loop().run_in_executor(_IO_EXECUTOR, _append_wal, line)
 
 
 def _load_config():
@@ -88,8 +213,8 @@ def _load_config():
             "ghl_webhook": None,
         }
     try:
-        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(CONFIG_FILE, "rb") as f:
+            return orjson.loads(f.read())
     except Exception:
         return {
             "revenue_enabled": False,
@@ -99,16 +224,41 @@ def _load_config():
         }
 
 
-def _save_config(data):
-    tmp = CONFIG_FILE + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
-    os.replace(tmp, CONFIG_FILE)
+async def _save_config(data):
+    _refresh_config_cache()
+    await _save_json_async(CONFIG_FILE, data)
 
 
 DEALS_DATA = _load_deals()
+# Older deals lack the epoch/lookup fields; when any get backfilled, make
+# the next snapshot persist them so the ISO strings are parsed once, not
+# on every start.
+if any([_backfill_ts(d) for d in DEALS_DATA["deals"]]):
+    _wal_records += 1
+# Statuses come back from orjson as fresh str objects; interning them lets
+# the `status == "sold"` checks all over the commands hit the identity
+# fast path against the (already interned) literals.
+for _d in DEALS_DATA["deals"]:
+    if "status" in _d:
+        _d["status"] = sys.intern(_d["status"])
 CONFIG_DATA = _load_config()
 
+# $/kW derived from CONFIG_DATA, or None when revenue is off. Refreshed
+# whenever the config is saved so _compute_revenue skips the dict probes.
+_REVENUE_PER_KW: Optional[float] = None
+
+
+def _refresh_config_cache():
+    global _REVENUE_PER_KW
+    per_kw = float(CONFIG_DATA.get("revenue_per_kw") or 0.0)
+    if CONFIG_DATA.get("revenue_enabled") and per_kw > 0:
+        _REVENUE_PER_KW = per_kw
+    else:
+        _REVENUE_PER_KW = None
+
+
+_refresh_config_cache()
+
 # ------------------------
 # Discord bot setup
 # ------------------------
@@ -130,6 +280,22 @@ LEADERBOARD_CHANNELS = {
 # Helpers
 # ------------------------
 
+# A user mention token, <@id> or <@!id>. #sold and #soldfor find their
+# mentions with this wherever they sit in the message; kW is always the
+# last token and the customer name is whatever lies in between.
+_MENTION_RE = re.compile(r"<@!?(\d+)>")
+
+# Status groups, as frozensets so membership checks are hash lookups
+PENDING_STATUSES = frozenset({"set"})
+CANCELED_STATUSES = frozenset({"canceled", "canceled_after_sign"})
+# Deals that count as an appointment the setter booked
+APPOINTMENT_STATUSES = frozenset({"set", "no_sale", "sold", "canceled_after_sign"})
+# Appointments booked today that haven't closed
+OPEN_OR_LOST_STATUSES = frozenset({"set", "no_sale"})
+# Statuses _filter_deals_period always / optionally skips
+_DELETED_STATUSES = frozenset({"deleted"})
+_DELETED_OR_CANCELED_STATUSES = _DELETED_STATUSES | CANCELED_STATUSES
+
 
 def _deal_type(kw: float) -> str:
     return "battery_only" if kw == 0.0 else "standard"
@@ -149,7 +315,7 @@ def _parse_date(date_str: str):
 
 
 def _get_guild_deals(guild_id: int):
-    return [d for d in DEALS_DATA["deals"] if d.get("guild_id") == guild_id]
+    return list(GUILD_DEALS.get(guild_id, {}).values())
 
 
 def _display_name(user_id: int | None, stored_name: str, use_mention: bool = False) -> str:
@@ -163,37 +329,46 @@ def _display_name(user_id: int | None, stored_name: str, use_mention: bool = Fal
     return stored_name or "Unknown"
 
 
+def _tag_argument(content: str) -> str:
+    """Return everything after the leading #tag, stripped ("" if nothing follows)."""
+    parts = content.split(None, 1)
+    return parts[1].strip() if len(parts) > 1 else ""
+
+
+def _mentioned_member(message: discord.Message, user_id: int):
+    """Resolve a user id captured from a mention token in the message."""
+    member = message.guild.get_member(user_id) if message.guild else None
+    if member is not None:
+        return member
+    for m in message.mentions:
+        if m.id == user_id:
+            return m
+    return None
+
+
 def _compute_revenue(kw: Optional[float]) -> Optional[float]:
     """Calculate revenue based on kW if enabled."""
-    if not kw:
-        return None
-    if not CONFIG_DATA.get("revenue_enabled"):
-        return None
-    per_kw = float(CONFIG_DATA.get("revenue_per_kw") or 0.0)
-    if per_kw <= 0:
+    if not kw or _REVENUE_PER_KW is None:
         return None
-    return kw * per_kw
+    return kw * _REVENUE_PER_KW
 
 
-def _compute_closer_streak(guild_id: int, closer_id: int) -> int:
+def _compute_closer_streak(guild_id: int, closer_id: int, now: Optional[datetime] = None) -> int:
     """Consecutive days (including today) this closer has at least one sold deal."""
     dates = set()
-    for d in _get_guild_deals(guild_id):
+    # Only this user's deals, via the per-user index
+    for d in USER_DEALS.get(guild_id, {}).get(closer_id, {}).values():
         if d.get("status") == "sold" and d.get("closer_id") == closer_id:
-            closed_at = d.get("closed_at") or d.get("created_at")
-            if not closed_at:
-                continue
-            try:
-                dt = datetime.fromisoformat(closed_at)
-            except Exception:
+            ts = _deal_ts(d)
+            if ts is None:
                 continue
-            dates.add(dt.date())
+            dates.add(datetime.fromtimestamp(ts, timezone.utc).date())
 
     if not dates:
         return 0
 
     streak = 0
-    current_day = _now_utc().date()
+    current_day = (now or _now_utc()).date()
     while current_day in dates:
         streak += 1
         current_day = current_day - timedelta(days=1)
@@ -205,7 +380,7 @@ async def _send_ghl_event(event: str, payload: Dict[str, Any]) -> None:
     if not CONFIG_DATA.get("ghl_enabled") or not CONFIG_DATA.get("ghl_webhook"):
         return
     try:
-        body = json.dumps({"event": event, **payload}).encode("utf-8")
+        body = orjson.dumps({"event": event, **payload})
         req = urllib.request.Request(
             CONFIG_DATA["ghl_webhook"],
             data=body,
@@ -217,7 +392,7 @@ async def _send_ghl_event(event: str, payload: Dict[str, Any]) -> None:
         print(f"GHL webhook error: {e}")
 
 
-def _add_deal(
+async def _add_deal(
     guild_id: int,
     setter_id: int | None,
     setter_name: str | None,
@@ -226,9 +401,12 @@ def _add_deal(
     customer_name: str,
     kw: float | None,
     status: str = "sold",
+    now: Optional[datetime] = None,
 ):
     deal_id = DEALS_DATA.get("next_id", 1)
     DEALS_DATA["next_id"] = deal_id + 1
+    now = now or _now_utc()
+    now_ts = int(now.timestamp())
 
     deal = {
         "id": deal_id,
@@ -238,39 +416,45 @@ def _add_deal(
         "closer_id": closer_id,
         "closer_name": closer_name,
         "customer_name": customer_name,
+        "customer_key": _customer_key(customer_name),
         "kw": float(kw) if kw is not None else None,
         "deal_type": _deal_type(float(kw)) if kw is not None else None,
         "status": status,
         "loss_reason": None,
         "loss_reason_detail": None,
-        "created_at": _now_utc().isoformat(),
-        "closed_at": _now_utc().isoformat() if status == "sold" else None,
+        "created_at": now.isoformat(),
+        "closed_at": now.isoformat() if status == "sold" else None,
+        # epoch seconds; used for all period filtering
+        "created_ts": now_ts,
+        "closed_ts": now_ts if status == "sold" else None,
         "no_sale_at": None,
         "canceled_at": None,
     }
     DEALS_DATA["deals"].append(deal)
-    _save_deals(DEALS_DATA)
+    _guild_index_add(deal)
+    _day_agg_apply(deal, 1)
+    _user_index_add(deal)
+    _customer_index_add(deal)
+    _user_totals_update(deal)
+    await _log_deal_change({"op": "put", "deal": deal})
     return deal
 
 
 def _find_deal_by_id(guild_id: int, deal_id: int):
-    for d in _get_guild_deals(guild_id):
-        if d.get("id") == deal_id:
-            return d
-    return None
+    return GUILD_DEALS.get(guild_id, {}).get(deal_id)
 
 
-def _find_latest_deal_by_customer(guild_id: int, customer_name: str, preferred_statuses: Optional[List[str]] = None):
-    customer_lower = customer_name.strip().lower()
-    candidates = []
-    for d in _get_guild_deals(guild_id):
-        if d.get("customer_name", "").strip().lower() == customer_lower:
-            if preferred_statuses is None or d.get("status") in preferred_statuses:
-                candidates.append(d)
+def _find_latest_deal_by_customer(guild_id: int, customer_name: str, preferred_statuses: Optional[frozenset] = None):
+    deals = CUSTOMER_DEALS.get(guild_id, {}).get(_customer_key(customer_name))
+    if not deals:
+        return None
+    candidates = [
+        d for d in deals.values()
+        if preferred_statuses is None or d.get("status") in preferred_statuses
+    ]
     if not candidates:
         return None
-    candidates.sort(key=lambda d: d.get("created_at") or "", reverse=True)
-    return candidates[0]
+    return max(candidates, key=lambda d: d.get("created_at") or "")
 
 
 def _filter_deals_period(
@@ -278,28 +462,23 @@ def _filter_deals_period(
     start_utc: datetime,
     end_utc: datetime,
     include_canceled: bool = False,
-    status_filter: Optional[List[str]] = None,
+    status_filter: Optional[frozenset] = None,
 ):
-    deals = _get_guild_deals(guild_id)
+    # Everything the loop needs is resolved to locals up front
+    excluded = _DELETED_STATUSES if include_canceled else _DELETED_OR_CANCELED_STATUSES
+    start_ts = start_utc.timestamp()
+    end_ts = end_utc.timestamp()
     result = []
-    for d in deals:
-        status = d.get("status", "sold")
-        if status == "deleted":
-            continue
-        if not include_canceled and status in ("canceled", "canceled_after_sign"):
-            continue
-        if status_filter and status not in status_filter:
+    append = result.append
+    for d in GUILD_DEALS.get(guild_id, {}).values():
+        # Use closed_ts for sold deals, created_ts for others (_deal_ts, inlined)
+        ts = d.get("closed_ts") or d.get("created_ts")
+        if ts is None or not start_ts <= ts < end_ts:
             continue
-        # Use closed_at for sold deals, created_at for others
-        ts = d.get("closed_at") or d.get("created_at")
-        if not ts:
-            continue
-        try:
-            created = datetime.fromisoformat(ts)
-        except Exception:
+        status = d.get("status", "sold")
+        if status in excluded or (status_filter and status not in status_filter):
             continue
-        if start_utc <= created < end_utc:
-            result.append(d)
+        append(d)
     return result
 
 
@@ -308,96 +487,34 @@ def _get_user_deals(guild_id: int, user_id: int, user_name: str):
     Get all deals where user is the closer OR the setter.
     Matches by ID first, then falls back to name matching for setters logged without @mention.
     """
-    deals = []
-    user_name_lower = user_name.lower().strip()
-    
-    for d in _get_guild_deals(guild_id):
-        if d.get("status") in ("deleted",):
-            continue
-        
-        # Check if user is the closer (by ID)
-        if d.get("closer_id") == user_id:
-            deals.append(d)
-            continue
-        
-        # Check if user is the setter (by ID)
-        if d.get("setter_id") == user_id:
-            deals.append(d)
-            continue
-        
-        # Fallback: check setter by name (for deals logged without @mention)
-        setter_name = d.get("setter_name", "")
-        if setter_name and setter_name.lower().strip() == user_name_lower:
-            deals.append(d)
-            continue
-    
-    return deals
+    deals = dict(USER_DEALS.get(guild_id, {}).get(user_id, {}))
+    # Fallback: setter by name (for deals logged without @mention)
+    deals.update(
+        SETTER_NAME_DEALS.get(guild_id, {}).get(user_name.lower().strip(), {})
+    )
+    # Deal ids increase with creation, so this keeps the stored order
+    return [
+        d for _, d in sorted(deals.items()) if d.get("status") not in ("deleted",)
+    ]
 
 
 def _get_user_deals_period(guild_id: int, user_id: int, user_name: str, start_utc, end_utc):
     """Get user's deals within a specific time period."""
-    all_deals = _get_user_deals(guild_id, user_id, user_name)
-    result = []
-    for d in all_deals:
-        ts = d.get("closed_at") or d.get("created_at")
-        if not ts:
-            continue
-        try:
-            created = datetime.fromisoformat(ts)
-        except Exception:
-            continue
-        if start_utc <= created < end_utc:
-            result.append(d)
-    return result
-
-
-def _aggregate_by_role(deals: list[dict], role: str):
-    """
-    Aggregate deals by closer or setter.
-    role = 'closer' or 'setter'
-    Returns list of {id, name, deals, kw} sorted by deals desc.
-    """
-    stats: dict[str, dict] = {}
-    for d in deals:
-        # Only count sold deals for aggregation
-        if d.get("status") != "sold":
-            continue
-        uid = d.get(f"{role}_id")
-        name = (d.get(f"{role}_name") or "").strip()
-        if not name:
-            continue
-        # Use ID as key if available, else lowercase name
-        key = str(uid) if uid else name.lower()
-        if key not in stats:
-            stats[key] = {
-                "id": uid,
-                "name": name,
-                "deals": 0,
-                "kw": 0.0,
-            }
-        stats[key]["deals"] += 1
-        stats[key]["kw"] += float(d.get("kw") or 0.0)
-    out = list(stats.values())
-    out.sort(key=lambda x: (x["deals"], x["kw"]), reverse=True)
-    return out
-
-
-def _split_by_type(deals: list[dict]):
-    """Split deals into standard and battery_only lists."""
-    standard = []
-    battery = []
-    for d in deals:
-        if d.get("status") != "sold":
+    start_ts = start_utc.timestamp()
+    end_ts = end_utc.timestamp()
+    guild_tl = USER_TIMELINE.get(guild_id, {})
+    deals = {}
+    for key in (user_id, user_name.lower().strip()):
+        tl = guild_tl.get(key)
+        if not tl:
             continue
-        dtype = d.get("deal_type")
-        if dtype is None:
-            kw = d.get("kw")
-            dtype = _deal_type(float(kw)) if kw is not None else "standard"
-        if dtype == "battery_only":
-            battery.append(d)
-        else:
-            standard.append(d)
-    return standard, battery
+        lo = bisect_left(tl, (start_ts,))
+        hi = bisect_left(tl, (end_ts,), lo)
+        for _, deal_id, d in tl[lo:hi]:
+            deals[deal_id] = d
+    return [
+        d for _, d in sorted(deals.items()) if d.get("status") not in ("deleted",)
+    ]
 
 
 def _period_bounds(kind: str, base_dt: datetime):
@@ -431,95 +548,484 @@ def _period_bounds(kind: str, base_dt: datetime):
     return start_utc, end_utc, start_local, end_local, pretty_kind
 
 
+# ---------------------------------------------------------------
+# Per-day leaderboard index
+# ---------------------------------------------------------------
+
+# DAY_AGG[guild_id]["YYYY-MM-DD"][dtype] = {
+#     "deals": n, "kw": f,
+#     "closer": {user_key: {"id", "name", "deals", "kw"}},
+#     "setter": {user_key: {"id", "name", "deals", "kw"}},
+# }
+# Only sold deals are counted, bucketed by Central Time day, so a
+# day/week/month scoreboard sums a few buckets instead of re-filtering
+# and re-aggregating every deal in the guild.
+DAY_AGG: Dict[int, Dict[str, Dict[str, dict]]] = {}
+
+# _BOARD_CACHE[guild_id][(start_day, end_day, top)] = _board_for_days result.
+# A guild's entries are dropped whenever its DAY_AGG changes, so repeat
+# !leaderboard calls between sales reuse the same board.
+_BOARD_CACHE: Dict[int, Dict[tuple, Dict[str, dict]]] = {}
+# !leaderboard <period> <date> can ask for any range, so cap how many
+# boards a quiet guild keeps; the posted day/week/month refill quickly.
+_BOARD_CACHE_MAX = 16
+
+
+def _deal_day(d: dict) -> Optional[str]:
+    ts = _deal_ts(d)
+    if ts is None:
+        return None
+    return datetime.fromtimestamp(ts, LOCAL_TZ).date().isoformat()
+
+
+def _deal_dtype(d: dict) -> str:
+    dtype = d.get("deal_type")
+    if dtype is None:
+        kw = d.get("kw")
+        dtype = _deal_type(float(kw)) if kw is not None else "standard"
+    return "battery_only" if dtype == "battery_only" else "standard"
+
+
+def _new_section() -> dict:
+    return {"deals": 0, "kw": 0.0, "closer": {}, "setter": {}}
+
+
+def _day_agg_apply(d: dict, sign: int):
+    """Add (sign=1) or remove (sign=-1) a sold deal from DAY_AGG."""
+    if d.get("status") != "sold":
+        return
+    _BOARD_CACHE.pop(d.get("guild_id"), None)
+    day = _deal_day(d)
+    if day is None:
+        return
+    dtype = _deal_dtype(d)
+    kw = float(d.get("kw") or 0.0)
+
+    days = DAY_AGG.setdefault(d.get("guild_id"), {})
+    sections = days.setdefault(day, {})
+    section = sections.setdefault(dtype, _new_section())
+    section["deals"] += sign
+    section["kw"] += sign * kw
+
+    for role in ("closer", "setter"):
+        uid = d.get(f"{role}_id")
+        name = (d.get(f"{role}_name") or "").strip()
+        if not name:
+            continue
+        # Use ID as key if available, else lowercase name
+        key = str(uid) if uid else name.lower()
+        rows = section[role]
+        row = rows.setdefault(key, {"id": uid, "name": name, "deals": 0, "kw": 0.0})
+        row["deals"] += sign
+        row["kw"] += sign * kw
+        if row["deals"] <= 0:
+            del rows[key]
+
+    if section["deals"] <= 0:
+        del sections[dtype]
+        if not sections:
+            del days[day]
+
+
+# Scoreboard order: deals, then kW. itemgetter builds the key tuple in C.
+_rank_key = itemgetter("deals", "kw")
+
+
+def _board_for_days(guild_id: int, start_day, end_day, top: Optional[int] = None) -> Dict[str, dict]:
+    """
+    Sum DAY_AGG over local days [start_day, end_day).
+    Returns {dtype: {"deals", "kw", "closer": [rows], "setter": [rows]}}
+    with rows sorted by deals then kW, descending. With `top`, only the
+    first `top` rows of each list are kept. The result is cached and
+    shared, so callers must not modify it.
+    """
+    cache_key = (start_day, end_day, top)
+    cached = _BOARD_CACHE.get(guild_id, {}).get(cache_key)
+    if cached is not None:
+        return cached
+
+    days = DAY_AGG.get(guild_id, {})
+    board: Dict[str, dict] = {}
+    day = start_day
+    while day < end_day:
+        for dtype, section in days.get(day.isoformat(), {}).items():
+            out = board.setdefault(dtype, _new_section())
+            out["deals"] += section["deals"]
+            out["kw"] += section["kw"]
+            for role in ("closer", "setter"):
+                merged = out[role]
+                for key, row in section[role].items():
+                    if key in merged:
+                        merged[key]["deals"] += row["deals"]
+                        merged[key]["kw"] += row["kw"]
+                    else:
+                        merged[key] = dict(row)
+        day += timedelta(days=1)
+
+    for section in board.values():
+        for role in ("closer", "setter"):
+            rows = section[role].values()
+            if top is None:
+                section[role] = sorted(rows, key=_rank_key, reverse=True)
+            else:
+                section[role] = heapq.nlargest(top, rows, key=_rank_key)
+    guild_cache = _BOARD_CACHE.setdefault(guild_id, {})
+    if len(guild_cache) >= _BOARD_CACHE_MAX:
+        guild_cache.clear()
+    guild_cache[cache_key] = board
+    return board
+
+
+# ---------------------------------------------------------------
+# Per-user / per-customer index
+# ---------------------------------------------------------------
+
+# USER_DEALS[guild_id][user_id] = {deal_id: deal} for deals where the
+# user is the closer or the setter; SETTER_NAME_DEALS covers setters
+# logged by name only. Keyed by deal id so a deal appears once and
+# removal is O(1).
+USER_DEALS: Dict[int, Dict[int, Dict[int, dict]]] = {}
+SETTER_NAME_DEALS: Dict[int, Dict[str, Dict[int, dict]]] = {}
+
+# USER_TIMELINE[guild_id][key] = [(ts, deal_id, deal), ...] sorted by
+# _deal_ts, for the same user ids / setter names as above, so period
+# queries are a bisect. _TIMELINE_TS[deal_id] is the ts a deal is filed
+# under, so it can be moved when it gets a closed_ts.
+USER_TIMELINE: Dict[int, Dict[Any, List[tuple]]] = {}
+_TIMELINE_TS: Dict[int, int] = {}
+
+
+def _timeline_keys(d: dict) -> list:
+    keys = [uid for uid in (d.get("closer_id"), d.get("setter_id")) if uid]
+    setter_name = (d.get("setter_name") or "").lower().strip()
+    if setter_name:
+        keys.append(setter_name)
+    return keys
+
+
+def _timeline_remove(d: dict):
+    ts = _TIMELINE_TS.pop(d["id"], None)
+    if ts is None:
+        return
+    guild_tl = USER_TIMELINE.get(d.get("guild_id"), {})
+    for key in _timeline_keys(d):
+        tl = guild_tl.get(key)
+        if not tl:
+            continue
+        i = bisect_left(tl, (ts, d["id"]))
+        if i < len(tl) and tl[i][1] == d["id"]:
+            del tl[i]
+
+
+def _timeline_add(d: dict):
+    _timeline_remove(d)
+    ts = _deal_ts(d)
+    if ts is None:
+        return
+    guild_tl = USER_TIMELINE.setdefault(d.get("guild_id"), {})
+    for key in dict.fromkeys(_timeline_keys(d)):
+        insort(guild_tl.setdefault(key, []), (ts, d["id"], d))
+    _TIMELINE_TS[d["id"]] = ts
+
+
+def _user_index_add(d: dict):
+    """Index a deal under its closer/setter. Safe to call again after edits."""
+    _timeline_add(d)
+    guild_users = USER_DEALS.setdefault(d.get("guild_id"), {})
+    for uid in (d.get("closer_id"), d.get("setter_id")):
+        if uid:
+            guild_users.setdefault(uid, {})[d["id"]] = d
+    setter_name = (d.get("setter_name") or "").lower().strip()
+    if setter_name:
+        SETTER_NAME_DEALS.setdefault(d.get("guild_id"), {}).setdefault(
+            setter_name, {}
+        )[d["id"]] = d
+
+
+def _user_index_remove(d: dict):
+    _timeline_remove(d)
+    guild_users = USER_DEALS.get(d.get("guild_id"), {})
+    for uid in (d.get("closer_id"), d.get("setter_id")):
+        guild_users.get(uid, {}).pop(d["id"], None)
+    setter_name = (d.get("setter_name") or "").lower().strip()
+    SETTER_NAME_DEALS.get(d.get("guild_id"), {}).get(setter_name, {}).pop(d["id"], None)
+
+
+# GUILD_DEALS[guild_id] = {deal_id: deal}, in the same order as the store,
+# so per-guild reads don't filter every guild's deals.
+GUILD_DEALS: Dict[int, Dict[int, dict]] = {}
+
+
+def _guild_index_add(d: dict):
+    GUILD_DEALS.setdefault(d.get("guild_id"), {})[d["id"]] = d
+
+
+def _guild_index_remove(d: dict):
+    GUILD_DEALS.get(d.get("guild_id"), {}).pop(d["id"], None)
+
+
+# CUSTOMER_DEALS[guild_id][customer_key] = {deal_id: deal}
+CUSTOMER_DEALS: Dict[int, Dict[str, Dict[int, dict]]] = {}
+
+
+def _customer_index_add(d: dict):
+    CUSTOMER_DEALS.setdefault(d.get("guild_id"), {}).setdefault(
+        d["customer_key"], {}
+    )[d["id"]] = d
+
+
+def _customer_index_remove(d: dict):
+    CUSTOMER_DEALS.get(d.get("guild_id"), {}).get(d["customer_key"], {}).pop(d["id"], None)
+
+
+# ---------------------------------------------------------------
+# Per-user all-time totals
+# ---------------------------------------------------------------
+
+# USER_TOTALS[guild_id][user_id] = the user's all-time !mystats counters.
+# SETTER_NAME_TOTALS[guild_id][setter_key] = sold deals by setter name,
+# with "by_uid" holding the part where a given user is the closer or
+# setter, so !mystats can drop deals it already counts (or must not count)
+# by id. _STATS_CONTRIB[deal_id] is what each deal last added, so an
+# update can undo it first.
+USER_TOTALS: Dict[int, Dict[int, dict]] = {}
+SETTER_NAME_TOTALS: Dict[int, Dict[str, dict]] = {}
+_STATS_CONTRIB: Dict[int, tuple] = {}
+
+
+def _new_user_totals() -> dict:
+    return {
+        "appts": 0,
+        "closed": 0,
+        "kw": 0.0,
+        "no_sale": 0,
+        "canceled": 0,
+        "setter_sold": 0,
+        "setter_kw": 0.0,
+        "loss": {},
+    }
+
+
+def _stats_contrib(d: dict) -> Optional[tuple]:
+    status = d.get("status")
+    if status == "deleted":
+        return None
+    return (
+        d.get("guild_id"),
+        status,
+        d.get("closer_id"),
+        d.get("setter_id"),
+        (d.get("setter_name") or "").lower().strip(),
+        float(d.get("kw") or 0.0),
+        d.get("loss_reason") or "other",
+    )
+
+
+def _apply_stats_contrib(contrib: tuple, sign: int):
+    guild_id, status, closer_id, setter_id, setter_key, kw, loss_code = contrib
+    users = USER_TOTALS.setdefault(guild_id, {})
+    if setter_id:
+        t = users.setdefault(setter_id, _new_user_totals())
+        if status in APPOINTMENT_STATUSES:
+            t["appts"] += sign
+        if status == "sold":
+            t["setter_sold"] += sign
+            # Reset on zero so float residue never shows as -0.0
+            t["setter_kw"] = t["setter_kw"] + sign * kw if t["setter_sold"] else 0.0
+    if closer_id:
+        t = users.setdefault(closer_id, _new_user_totals())
+        if status == "sold":
+            t["closed"] += sign
+            t["kw"] = t["kw"] + sign * kw if t["closed"] else 0.0
+        elif status == "no_sale":
+            t["no_sale"] += sign
+            loss = t["loss"]
+            loss[loss_code] = loss.get(loss_code, 0) + sign
+            if not loss[loss_code]:
+                del loss[loss_code]
+        elif status == "canceled_after_sign":
+            t["canceled"] += sign
+    if status == "sold" and setter_key:
+        names = SETTER_NAME_TOTALS.setdefault(guild_id, {})
+        n = names.setdefault(setter_key, {"deals": 0, "kw": 0.0, "by_uid": {}})
+        n["deals"] += sign
+        n["kw"] = n["kw"] + sign * kw if n["deals"] else 0.0
+        for uid in {closer_id, setter_id} - {None}:
+            row = n["by_uid"].setdefault(uid, [0, 0.0])
+            row[0] += sign
+            row[1] = row[1] + sign * kw if row[0] else 0.0
+
+
+def _user_totals_forget(deal_id: int):
+    old = _STATS_CONTRIB.pop(deal_id, None)
+    if old is not None:
+        _apply_stats_contrib(old, -1)
+
+
+def _user_totals_update(d: dict):
+    _user_totals_forget(d["id"])
+    contrib = _stats_contrib(d)
+    if contrib is not None:
+        _apply_stats_contrib(contrib, 1)
+        _STATS_CONTRIB[d["id"]] = contrib
+
+
+def _user_stats_alltime(guild_id: int, user_id: int, user_name: str) -> dict:
+    """!mystats counters for all time, read from the running totals."""
+    totals = USER_TOTALS.get(guild_id, {}).get(user_id) or _new_user_totals()
+    stats = dict(totals, loss=dict(totals["loss"]))
+    # Sold deals logged under the user's name where they aren't the
+    # closer or setter by id
+    named = SETTER_NAME_TOTALS.get(guild_id, {}).get(user_name.lower().strip())
+    if named:
+        own_deals, own_kw = named["by_uid"].get(user_id, (0, 0.0))
+        extra = named["deals"] - own_deals
+        if extra:
+            stats["setter_sold"] += extra
+            stats["setter_kw"] += named["kw"] - own_kw
+    return stats
+
+
+def _user_stats(deals: list, user_id: int, user_name: str) -> dict:
+    """!mystats counters over a list of the user's deals, in one pass."""
+    stats = _new_user_totals()
+    loss_counts = stats["loss"]
+    user_key = user_name.lower().strip()
+    for d in deals:
+        status = d.get("status")
+        closer_id = d.get("closer_id")
+        setter_id = d.get("setter_id")
+        if status in APPOINTMENT_STATUSES and setter_id == user_id:
+            stats["appts"] += 1
+        if status == "sold":
+            kw = float(d.get("kw") or 0.0)
+            if closer_id == user_id:
+                stats["closed"] += 1
+                stats["kw"] += kw
+            if setter_id == user_id or (
+                closer_id != user_id and (d.get("setter_name") or "").lower().strip() == user_key
+            ):
+                stats["setter_sold"] += 1
+                stats["setter_kw"] += kw
+        elif closer_id == user_id:
+            if status == "no_sale":
+                stats["no_sale"] += 1
+                code = d.get("loss_reason") or "other"
+                loss_counts[code] = loss_counts.get(code, 0) + 1
+            elif status == "canceled_after_sign":
+                stats["canceled"] += 1
+    return stats
+
+
+def _rebuild_indexes():
+    GUILD_DEALS.clear()
+    DAY_AGG.clear()
+    _BOARD_CACHE.clear()
+    USER_DEALS.clear()
+    SETTER_NAME_DEALS.clear()
+    USER_TIMELINE.clear()
+    _TIMELINE_TS.clear()
+    CUSTOMER_DEALS.clear()
+    USER_TOTALS.clear()
+    SETTER_NAME_TOTALS.clear()
+    _STATS_CONTRIB.clear()
+    for d in DEALS_DATA["deals"]:
+        _guild_index_add(d)
+        _day_agg_apply(d, 1)
+        _user_index_add(d)
+        _customer_index_add(d)
+        _user_totals_update(d)
+
+
+def _drop_guild_indexes(guild_id: int):
+    for deal_id in GUILD_DEALS.pop(guild_id, {}):
+        _STATS_CONTRIB.pop(deal_id, None)
+    USER_TOTALS.pop(guild_id, None)
+    SETTER_NAME_TOTALS.pop(guild_id, None)
+    DAY_AGG.pop(guild_id, None)
+    _BOARD_CACHE.pop(guild_id, None)
+    USER_DEALS.pop(guild_id, None)
+    SETTER_NAME_DEALS.pop(guild_id, None)
+    for tl in USER_TIMELINE.pop(guild_id, {}).values():
+        for _, deal_id, _ in tl:
+            _TIMELINE_TS.pop(deal_id, None)
+    CUSTOMER_DEALS.pop(guild_id, None)
+
+
+_rebuild_indexes()
+
+
 # ---------------------------------------------------------------
 # Build scoreboard  (plain-text for leaderboard channels - NO MENTIONS)
 # ---------------------------------------------------------------
 
-def _build_section_lines(deals: list[dict], role: str, show_kw: bool = True) -> list[str]:
+def _build_section_lines(rows: list[dict], role: str, show_kw: bool = True) -> list[str]:
     """
-    Build 'Closer:' or 'Setter:' lines for a list of deals.
+    Build 'Closer:' or 'Setter:' lines from aggregated rows.
     NO @mentions - just plain names.
     Shows kW next to each person.
     """
-    agg = _aggregate_by_role(deals, role)
-    if not agg:
+    if not rows:
         return []
-    lines = []
     label = "Closer :" if role == "closer" else "Setter :"
-    lines.append(label)
-    lines.append("")
-    for row in agg:
-        # Use plain name, NOT mention
-        name = row["name"]
-        if show_kw:
-            lines.append(f"  {name} - {row['deals']} ({row['kw']:.1f} kW)")
-        else:
-            lines.append(f"  {name} - {row['deals']}")
+    lines = [label, ""]
+    # Use plain name, NOT mention. show_kw is fixed per call, so pick the
+    # row format once rather than per row.
+    if show_kw:
+        lines.extend(f"  {row['name']} - {row['deals']} ({row['kw']:.1f} kW)" for row in rows)
+    else:
+        lines.extend(f"  {row['name']} - {row['deals']}" for row in rows)
     return lines
 
 
 def _build_leaderboard_content(
-    deals: list[dict],
+    board: Dict[str, dict],
     period_label: str,
     date_label: str,
 ) -> str:
     """
-    Build a plain-text scoreboard for leaderboard channels.
+    Build a plain-text scoreboard for leaderboard channels from a
+    _board_for_days result.
     NO @mentions - just plain display names.
     Shows kW next to each person.
     """
-    # Filter to only sold deals
-    sold_deals = [d for d in deals if d.get("status") == "sold"]
-    standard_deals, battery_deals = _split_by_type(sold_deals)
+    standard = board.get("standard")
+    battery = board.get("battery_only")
 
     lines = []
     lines.append(f"{period_label} ⚡")
     lines.append("")
 
-    if not sold_deals:
+    if not board:
         lines.append("_No deals yet — be the first to log a sale with `#sold`!_")
         return "\n".join(lines)
 
-    # --- Standard section ---
-    if standard_deals:
-        lines.append("Standard ⚡")
-        lines.append("")
-
-        closer_lines = _build_section_lines(standard_deals, "closer", show_kw=True)
-        if closer_lines:
-            lines.extend(closer_lines)
-            lines.append("")
-
-        setter_lines = _build_section_lines(standard_deals, "setter", show_kw=True)
-        if setter_lines:
-            lines.extend(setter_lines)
-            lines.append("")
-
-    # --- Battery Only section ---
-    if battery_deals:
-        lines.append("Battery Only 🔋")
+    for section, heading in ((standard, "Standard ⚡"), (battery, "Battery Only 🔋")):
+        if not section:
+            continue
+        lines.append(heading)
         lines.append("")
 
-        closer_lines = _build_section_lines(battery_deals, "closer", show_kw=True)
+        closer_lines = _build_section_lines(section["closer"], "closer", show_kw=True)
         if closer_lines:
             lines.extend(closer_lines)
             lines.append("")
 
-        setter_lines = _build_section_lines(battery_deals, "setter", show_kw=True)
+        setter_lines = _build_section_lines(section["setter"], "setter", show_kw=True)
         if setter_lines:
             lines.extend(setter_lines)
             lines.append("")
 
     # --- Totals ---
-    total_deals = len(sold_deals)
-    total_kw = sum(float(d.get("kw") or 0.0) for d in sold_deals)
+    total_deals = sum(section["deals"] for section in board.values())
+    total_kw = sum(section["kw"] for section in board.values())
 
     lines.append(f"**Total Transactions Sold:** {total_deals}")
     lines.append(f"**Total kW Sold:** {total_kw:.2f} kW")
     
     # Revenue if enabled
     if CONFIG_DATA.get("revenue_enabled"):
-        total_rev = sum(_compute_revenue(float(d.get("kw") or 0.0)) or 0.0 for d in sold_deals)
+        total_rev = _compute_revenue(total_kw) or 0.0
         lines.append(f"**Est. Revenue:** ${total_rev:,.2f}")
     
     lines.append("")
@@ -531,15 +1037,20 @@ def _build_leaderboard_content(
     return "\n".join(lines)
 
 
+MEDALS = ("🥇", "🥈", "🥉")
+# Rows per closer/setter list in the !leaderboard embed
+EMBED_TOP_N = 10
+
+
 def _build_leaderboard_embed(
     guild: discord.Guild,
-    deals: list[dict],
+    board: Dict[str, dict],
     period_label: str,
     date_label: str,
     use_mentions: bool = True,
 ):
     """
-    Embed version used by the !leaderboard command.
+    Embed version used by the !leaderboard command, from a _board_for_days result.
     use_mentions=True for admin command, False otherwise.
     """
     embed = discord.Embed(
@@ -548,10 +1059,7 @@ def _build_leaderboard_embed(
         color=0xf1c40f,
     )
 
-    # Filter to only sold deals
-    sold_deals = [d for d in deals if d.get("status") == "sold"]
-
-    if not sold_deals:
+    if not board:
         embed.add_field(
             name="No deals yet",
             value="Be the first to log a sale with `#sold`!",
@@ -559,52 +1067,50 @@ def _build_leaderboard_embed(
         )
         return embed
 
-    standard_deals, battery_deals = _split_by_type(sold_deals)
-    medals = ["🥇", "🥈", "🥉"]
+    standard = board.get("standard")
+    battery = board.get("battery_only")
+    show_revenue = CONFIG_DATA.get("revenue_enabled")
+    # Resolve the rate once; per row revenue is then a single multiply
+    rate = _REVENUE_PER_KW or 0.0
 
-    def _role_lines(deal_list, role):
-        agg = _aggregate_by_role(deal_list, role)
+    def _role_lines(rows):
         out = []
-        for idx, row in enumerate(agg[:10]):
-            icon = medals[idx] if idx < len(medals) else f"{idx+1}."
+        for idx, row in enumerate(rows[:EMBED_TOP_N]):
+            icon = MEDALS[idx] if idx < len(MEDALS) else f"{idx+1}."
             display = _display_name(row["id"], row["name"], use_mention=use_mentions)
-            line = f"{icon} {display} – {row['deals']} deal(s), {row['kw']:.1f} kW"
-            if CONFIG_DATA.get("revenue_enabled"):
-                rev = _compute_revenue(row["kw"]) or 0
-                line += f", ${rev:,.0f}"
-            out.append(line)
+            if show_revenue:
+                out.append(
+                    f"{icon} {display} – {row['deals']} deal(s), {row['kw']:.1f} kW, "
+                    f"${row['kw'] * rate:,.0f}"
+                )
+            else:
+                out.append(f"{icon} {display} – {row['deals']} deal(s), {row['kw']:.1f} kW")
         return "\n".join(out)
 
-    if standard_deals:
-        cl = _role_lines(standard_deals, "closer")
-        if cl:
-            embed.add_field(name="⚡ Standard — Closers", value=cl, inline=False)
-        sl = _role_lines(standard_deals, "setter")
-        if sl:
-            embed.add_field(name="⚡ Standard — Setters", value=sl, inline=False)
-
-    if battery_deals:
-        cl = _role_lines(battery_deals, "closer")
+    for section, heading in ((standard, "⚡ Standard"), (battery, "🔋 Battery Only")):
+        if not section:
+            continue
+        cl = _role_lines(section["closer"])
         if cl:
-            embed.add_field(name="🔋 Battery Only — Closers", value=cl, inline=False)
-        sl = _role_lines(battery_deals, "setter")
+            embed.add_field(name=f"{heading} — Closers", value=cl, inline=False)
+        sl = _role_lines(section["setter"])
         if sl:
-            embed.add_field(name="🔋 Battery Only — Setters", value=sl, inline=False)
+            embed.add_field(name=f"{heading} — Setters", value=sl, inline=False)
 
-    total_deals = len(sold_deals)
-    total_kw = sum(float(d.get("kw") or 0.0) for d in sold_deals)
-    
-    totals_value = (
-        f"💼 **Deals:** {total_deals}\n"
-        f"⚡ **kW:** {total_kw:.1f}\n"
-        f"Standard: {len(standard_deals)}  •  Battery Only: {len(battery_deals)}"
-    )
+    standard_count = standard["deals"] if standard else 0
+    battery_count = battery["deals"] if battery else 0
+    total_deals = standard_count + battery_count
+    total_kw = sum(section["kw"] for section in board.values())
     
-    if CONFIG_DATA.get("revenue_enabled"):
-        total_rev = sum(_compute_revenue(float(d.get("kw") or 0.0)) or 0.0 for d in sold_deals)
-        totals_value += f"\n💰 **Est. Revenue:** ${total_rev:,.2f}"
-    
-    embed.add_field(name="Totals", value=totals_value, inline=False)
+    totals_lines = [
+        f"💼 **Deals:** {total_deals}",
+        f"⚡ **kW:** {total_kw:.1f}",
+        f"Standard: {standard_count}  •  Battery Only: {battery_count}",
+    ]
+    if show_revenue:
+        totals_lines.append(f"💰 **Est. Revenue:** ${total_kw * rate:,.2f}")
+
+    embed.add_field(name="Totals", value="\n".join(totals_lines), inline=False)
     embed.set_footer(text="Use !leaderboard [day|week|month] [YYYY-MM-DD] for history")
     return embed
 
@@ -613,6 +1119,11 @@ def _build_leaderboard_embed(
 # Channel management
 # ---------------------------------------------------------------
 
+def _text_channels_by_name(guild: discord.Guild) -> dict:
+    """Map channel name -> text channel, built in a single pass over the guild."""
+    return {c.name: c for c in guild.text_channels}
+
+
 async def ensure_leaderboard_channels(guild: discord.Guild):
     try:
         bot_member = guild.me
@@ -641,12 +1152,28 @@ async def ensure_leaderboard_channels(guild: discord.Guild):
             ),
         }
 
-        for name, topic in LEADERBOARD_CHANNELS.items():
-            chan = discord.utils.get(guild.text_channels, name=name)
+        by_name = _text_channels_by_name(guild)
+
+        async def ensure_one(name: str, topic: str):
+            chan = by_name.get(name)
             if chan is None:
                 await guild.create_text_channel(name, topic=topic, overwrites=overwrites)
-            else:
-                await chan.edit(topic=topic, overwrites=overwrites)
+                return
+            if chan.topic == topic and all(
+                chan.overwrites_for(target) == wanted for target, wanted in overwrites.items()
+            ):
+                # Already set up; skip the rate-limited PATCH
+                return
+            await chan.edit(topic=topic, overwrites=overwrites)
+
+        # The channels are independent, so set them up concurrently.
+        results = await asyncio.gather(
+            *(ensure_one(name, topic) for name, topic in LEADERBOARD_CHANNELS.items()),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
     except discord.Forbidden:
         return
     except Exception as e:
@@ -658,46 +1185,43 @@ async def _post_today_leaderboards(guild: discord.Guild):
     Post fresh scoreboards to all three leaderboard channels.
     NO @mentions - just plain text with names and kW.
     """
-    now_local = _now_local()
-
-    start_day_utc, end_day_utc, start_day_local, _, _ = _period_bounds("day", now_local)
-    deals_day = _filter_deals_period(guild.id, start_day_utc, end_day_utc)
-
-    start_week_utc, end_week_utc, start_week_local, end_week_local, _ = _period_bounds("week", now_local)
-    deals_week = _filter_deals_period(guild.id, start_week_utc, end_week_utc)
-
-    start_month_utc, end_month_utc, start_month_local, _, _ = _period_bounds("month", now_local)
-    deals_month = _filter_deals_period(guild.id, start_month_utc, end_month_utc)
+    by_name = _text_channels_by_name(guild)
+    channel_map = {name: by_name[name] for name in LEADERBOARD_CHANNELS if name in by_name}
+    if not channel_map:
+        return
 
-    channel_map = {}
-    for name in LEADERBOARD_CHANNELS:
-        chan = discord.utils.get(guild.text_channels, name=name)
-        if chan:
-            channel_map[name] = chan
+    # Only build the boards for channels that exist
+    now_local = _now_local()
 
     if "daily-leaderboard" in channel_map:
+        _, _, start_day_local, end_day_local, _ = _period_bounds("day", now_local)
+        board_day = _board_for_days(guild.id, start_day_local.date(), end_day_local.date())
         content = _build_leaderboard_content(
-            deals_day,
+            board_day,
             "Daily Blitz Scoreboard",
             start_day_local.date().isoformat(),
         )
         await channel_map["daily-leaderboard"].send(content)
 
     if "weekly-leaderboard" in channel_map:
+        _, _, start_week_local, end_week_local, _ = _period_bounds("week", now_local)
+        board_week = _board_for_days(guild.id, start_week_local.date(), end_week_local.date())
         week_label = (
             f"{start_week_local.date().isoformat()} → "
             f"{(end_week_local - timedelta(days=1)).date().isoformat()}"
         )
         content = _build_leaderboard_content(
-            deals_week,
+            board_week,
             "Weekly Blitz Scoreboard",
             week_label,
         )
         await channel_map["weekly-leaderboard"].send(content)
 
     if "monthly-leaderboard" in channel_map:
+        _, _, start_month_local, end_month_local, _ = _period_bounds("month", now_local)
+        board_month = _board_for_days(guild.id, start_month_local.date(), end_month_local.date())
         content = _build_leaderboard_content(
-            deals_month,
+            board_month,
             "Monthly Blitz Scoreboard",
             start_month_local.date().strftime("%Y-%m"),
         )
@@ -708,10 +1232,52 @@ async def _post_today_leaderboards(guild: discord.Guild):
 # Permission check helper
 # ---------------------------------------------------------------
 
+POWER_ROLE_NAMES = frozenset({"admin", "manager"})
+
+# guild_id -> ids of the guild's "admin"/"manager" roles. Filled lazily and
+# dropped by the role events below when the guild's roles change.
+_power_role_ids: Dict[int, frozenset] = {}
+
+
+def _guild_power_role_ids(guild: discord.Guild) -> frozenset:
+    ids = _power_role_ids.get(guild.id)
+    if ids is None:
+        ids = frozenset(r.id for r in guild.roles if r.name.lower() in POWER_ROLE_NAMES)
+        _power_role_ids[guild.id] = ids
+    return ids
+
+
 def _is_admin_or_manager(member: discord.Member) -> bool:
     if member.guild_permissions.administrator:
         return True
-    return any(r.name.lower() in {"admin", "manager"} for r in getattr(member, "roles", []))
+    guild = getattr(member, "guild", None)
+    if guild is None:
+        return False
+    return any(member.get_role(rid) is not None for rid in _guild_power_role_ids(guild))
+
+
+# ---------------------------------------------------------------
+# Snapshot
+# ---------------------------------------------------------------
+
+@tasks.loop(minutes=5)
+async def snapshot_task():
+    """Fold the WAL into a full DEALS_FILE snapshot."""
+    global _wal_records
+    if not _wal_records:
+        return
+    # Serialize here so the snapshot matches exactly the records logged so far;
+    # anything logged after this lands in the fresh WAL.
+    payload = orjson.dumps(DEALS_DATA, option=orjson.OPT_INDENT_2)
+    _wal_records = 0
+    try:
+        await asyncio.get_running_loop().run_in_executor(
+            _IO_EXECUTOR, _write_snapshot, payload
+        )
+    except Exception as e:
+        # WAL was not truncated, so just retry on the next tick
+        _wal_records += 1
+        print(f"[snapshot_task] error: {e}")
 
 
 # ---------------------------------------------------------------
@@ -723,8 +1289,16 @@ def _is_admin_or_manager(member: discord.Member) -> bool:
 async def on_ready():
     print(f"{bot.user} has connected to Discord!")
     print(f"Guilds: {[g.name for g in bot.guilds]}")
-    for guild in bot.guilds:
-        await ensure_leaderboard_channels(guild)
+    if not snapshot_task.is_running():
+        snapshot_task.start()
+    # Channel setup is all API round-trips; run the guilds concurrently
+    results = await asyncio.gather(
+        *(ensure_leaderboard_channels(guild) for guild in bot.guilds),
+        return_exceptions=True,
+    )
+    for guild, result in zip(bot.guilds, results):
+        if isinstance(result, Exception):
+            print(f"[on_ready] channel setup failed for {guild.name}: {result}")
 
 
 @bot.event
@@ -732,6 +1306,22 @@ async def on_guild_join(guild: discord.Guild):
     await ensure_leaderboard_channels(guild)
 
 
+@bot.event
+async def on_guild_role_create(role: discord.Role):
+    _power_role_ids.pop(role.guild.id, None)
+
+
+@bot.event
+async def on_guild_role_delete(role: discord.Role):
+    _power_role_ids.pop(role.guild.id, None)
+
+
+@bot.event
+async def on_guild_role_update(before: discord.Role, after: discord.Role):
+    if before.name != after.name:
+        _power_role_ids.pop(after.guild.id, None)
+
+
 @bot.event
 async def on_message(message: discord.Message):
     if message.author.bot:
@@ -750,19 +1340,27 @@ async def on_message(message: discord.Message):
         return
 
     content = message.content.strip()
-    lower = content.lower()
+    if not content.startswith("#"):
+        # Ordinary chatter and ! commands: nothing for the hashtag handlers.
+        await bot.process_commands(message)
+        return
+
+    # Tags are matched by prefix only, so there is no need to lowercase the
+    # whole message body.
+    lower = content[:32].lower()
 
     # ----------------------------------------------------------------
     # #set Customer Name - Log an appointment (setter)
     # ----------------------------------------------------------------
     if lower.startswith("#set "):
-        customer_name = content[5:].strip()
+        customer_name = _tag_argument(content)
         if not customer_name:
             await message.channel.send("❌ Please include the customer's name. Example: `#set John Smith`")
             await bot.process_commands(message)
             return
 
-        deal = _add_deal(
+        now = _now_utc()
+        deal = await _add_deal(
             guild_id=message.guild.id,
             setter_id=message.author.id,
             setter_name=message.author.display_name,
@@ -771,13 +1369,14 @@ async def on_message(message: discord.Message):
             customer_name=customer_name,
             kw=None,
             status="set",
+            now=now,
         )
 
         embed = discord.Embed(
             title="🎯 Appointment Set!",
             description=f"{message.author.mention} just set an appointment!",
-            color=discord.Color.green(),
-            timestamp=_now_utc(),
+            color=GREEN,
+            timestamp=now,
         )
         embed.add_field(name="Customer", value=customer_name, inline=True)
         embed.add_field(name="Setter", value=message.author.display_name, inline=True)
@@ -801,60 +1400,57 @@ async def on_message(message: discord.Message):
             parts = content.split()
             if len(parts) < 3:
                 raise ValueError("Not enough parts")
+            now = _now_utc()
 
-            setter_member = message.mentions[0] if message.mentions else None
+            mention = _MENTION_RE.search(content)
+            rest = content[mention.end():].split() if mention else parts[1:]
+            if not rest:
+                raise ValueError("Missing kW")
             setter_name = None
             setter_id = None
-            kw = None
-            customer_name = None
+            kw = float(rest[-1])
+            customer_name = " ".join(rest[:-1]) or None
 
-            if setter_member:
+            if mention:
                 # Format: #sold @Setter [Customer Name] kW
-                mention_token = None
-                for p in parts:
-                    if p.startswith("<@") and p.endswith(">"):
-                        mention_token = p
-                        break
-                if mention_token is None:
+                setter_member = _mentioned_member(message, int(mention[1]))
+                if setter_member is None:
                     raise ValueError("No mention found")
-                idx = parts.index(mention_token)
-                if len(parts) - idx < 2:
-                    raise ValueError("Missing kW")
-                kw_token = parts[-1]
-                kw = float(kw_token)
-                customer_tokens = parts[idx + 1 : -1]
-                customer_name = " ".join(customer_tokens) if customer_tokens else None
                 setter_id = setter_member.id
                 setter_name = setter_member.display_name
             else:
                 # Format: #sold Customer Name kW (check if there's a pending deal)
-                kw_token = parts[-1]
-                kw = float(kw_token)
-                customer_name = " ".join(parts[1:-1]).strip()
+                if not customer_name:
+                    raise ValueError("Not enough parts")
                 
                 # Try to find existing deal for this customer
                 existing_deal = _find_latest_deal_by_customer(
                     message.guild.id, 
                     customer_name, 
-                    preferred_statuses=["set"]
+                    preferred_statuses=PENDING_STATUSES
                 )
                 
                 if existing_deal:
                     # Update existing deal
+                    _day_agg_apply(existing_deal, -1)
                     existing_deal["status"] = "sold"
                     existing_deal["closer"] = message.author.display_name
                     existing_deal["closer_id"] = message.author.id
                     existing_deal["closer_name"] = message.author.display_name
                     existing_deal["kw"] = kw
                     existing_deal["deal_type"] = _deal_type(kw)
-                    existing_deal["closed_at"] = _now_utc().isoformat()
-                    _save_deals(DEALS_DATA)
+                    existing_deal["closed_at"] = now.isoformat()
+                    existing_deal["closed_ts"] = int(now.timestamp())
+                    _day_agg_apply(existing_deal, 1)
+                    _user_index_add(existing_deal)
+                    _user_totals_update(existing_deal)
+                    await _log_deal_change({"op": "put", "deal": existing_deal})
                     
                     setter_id = existing_deal.get("setter_id")
                     setter_name = existing_deal.get("setter_name")
                     
                     revenue = _compute_revenue(kw)
-                    streak_days = _compute_closer_streak(message.guild.id, message.author.id)
+                    streak_days = _compute_closer_streak(message.guild.id, message.author.id, now)
                     
                     # Send GHL event
                     await _send_ghl_event("deal_sold", {
@@ -869,8 +1465,8 @@ async def on_message(message: discord.Message):
                     embed = discord.Embed(
                         title="🎉 DEAL CLOSED!",
                         description=f"Deal for **{customer_name}** has been closed!",
-                        color=discord.Color.gold(),
-                        timestamp=_now_utc(),
+                        color=GOLD,
+                        timestamp=now,
                     )
                     embed.add_field(name="⚡ System Size", value=f"{kw:.1f} kW", inline=True)
                     if revenue:
@@ -886,14 +1482,14 @@ async def on_message(message: discord.Message):
                     return
                 else:
                     # No existing deal - treat first word after #sold as setter name
-                    setter_name = parts[1]
-                    customer_tokens = parts[2:-1]
-                    customer_name = " ".join(customer_tokens) if customer_tokens else "N/A"
+                    name_parts = customer_name.split(None, 1)
+                    setter_name = name_parts[0]
+                    customer_name = name_parts[1] if len(name_parts) > 1 else "N/A"
 
             closer_member = message.author
             closer_name = closer_member.display_name
 
-            deal = _add_deal(
+            deal = await _add_deal(
                 guild_id=message.guild.id,
                 setter_id=setter_id,
                 setter_name=setter_name,
@@ -902,10 +1498,11 @@ async def on_message(message: discord.Message):
                 customer_name=customer_name or "N/A",
                 kw=kw,
                 status="sold",
+                now=now,
             )
 
             revenue = _compute_revenue(kw)
-            streak_days = _compute_closer_streak(message.guild.id, closer_member.id)
+            streak_days = _compute_closer_streak(message.guild.id, closer_member.id, now)
             dtype_label = _deal_type_label(deal["deal_type"])
 
             # Send GHL event
@@ -968,30 +1565,22 @@ async def on_message(message: discord.Message):
             return
 
         try:
-            parts = content.split()
-            if len(parts) < 4:
-                raise ValueError("Not enough parts")
-
-            mentions = message.mentions
+            mentions = list(_MENTION_RE.finditer(content))
             if len(mentions) < 2:
                 raise ValueError("Need two @mentions: closer and setter")
 
-            mention_tokens = [p for p in parts if p.startswith("<@") and p.endswith(">")]
-            if len(mention_tokens) < 2:
-                raise ValueError("Need two mentions")
-
-            closer_member = mentions[0]
-            setter_member = mentions[1]
-
-            second_mention_idx = parts.index(mention_tokens[1])
-
-            kw_token = parts[-1]
-            kw = float(kw_token)
+            closer_member = _mentioned_member(message, int(mentions[0][1]))
+            setter_member = _mentioned_member(message, int(mentions[1][1]))
+            if closer_member is None or setter_member is None:
+                raise ValueError("Need two @mentions: closer and setter")
 
-            customer_tokens = parts[second_mention_idx + 1 : -1]
-            customer_name = " ".join(customer_tokens) if customer_tokens else None
+            rest = content[mentions[1].end():].split()
+            if not rest:
+                raise ValueError("Missing kW")
+            kw = float(rest[-1])
+            customer_name = " ".join(rest[:-1]) or None
 
-            deal = _add_deal(
+            deal = await _add_deal(
                 guild_id=message.guild.id,
                 setter_id=setter_member.id,
                 setter_name=setter_member.display_name,
@@ -1048,13 +1637,13 @@ async def on_message(message: discord.Message):
     # #nosale Customer Name - Mark a deal as no-sale with reason tracking
     # ----------------------------------------------------------------
     if lower.startswith("#nosale "):
-        customer_name = content[8:].strip()
+        customer_name = _tag_argument(content)
         if not customer_name:
             await message.channel.send("❌ Please include the customer's name. Example: `#nosale John Smith`")
             await bot.process_commands(message)
             return
 
-        deal = _find_latest_deal_by_customer(message.guild.id, customer_name, preferred_statuses=["set"])
+        deal = _find_latest_deal_by_customer(message.guild.id, customer_name, preferred_statuses=PENDING_STATUSES)
         if not deal:
             await message.channel.send(
                 f"❌ No pending appointment found for **{customer_name}**. "
@@ -1067,7 +1656,9 @@ async def on_message(message: discord.Message):
         deal["no_sale_at"] = _now_utc().isoformat()
         deal["closer_id"] = message.author.id
         deal["closer_name"] = message.author.display_name
-        _save_deals(DEALS_DATA)
+        _user_index_add(deal)
+        _user_totals_update(deal)
+        await _log_deal_change({"op": "put", "deal": deal})
 
         # DM for loss reason
         try:
@@ -1098,7 +1689,8 @@ async def on_message(message: discord.Message):
 
             deal["loss_reason"] = reason_code
             deal["loss_reason_detail"] = reason_text
-            _save_deals(DEALS_DATA)
+            _user_totals_update(deal)
+            await _log_deal_change({"op": "put", "deal": deal})
 
             await message.channel.send(f"🚫 **{deal['customer_name']}** marked as no-sale ({reason_text}).")
         except asyncio.TimeoutError:
@@ -1116,7 +1708,7 @@ async def on_message(message: discord.Message):
     # #cancel Customer Name - Mark deal as canceled
     # ----------------------------------------------------------------
     if lower.startswith("#cancel "):
-        customer_name = content[8:].strip()
+        customer_name = _tag_argument(content)
         if not customer_name:
             await message.channel.send("❌ Please include the customer's name. Example: `#cancel John Smith`")
             await bot.process_commands(message)
@@ -1127,14 +1719,16 @@ async def on_message(message: discord.Message):
             await message.channel.send(f"❌ No deal found for customer `{customer_name}`.")
             return
 
-        if deal.get("status") in ("canceled", "canceled_after_sign"):
+        if deal.get("status") in CANCELED_STATUSES:
             await message.channel.send(f"ℹ️ Deal for `{customer_name}` is already canceled.")
             return
 
         old_status = deal.get("status")
+        _day_agg_apply(deal, -1)
         deal["status"] = "canceled_after_sign" if old_status == "sold" else "canceled"
         deal["canceled_at"] = _now_utc().isoformat()
-        _save_deals(DEALS_DATA)
+        _user_totals_update(deal)
+        await _log_deal_change({"op": "put", "deal": deal})
 
         embed = discord.Embed(
             title="⚠️ Deal Canceled",
@@ -1168,10 +1762,9 @@ async def on_message(message: discord.Message):
             return
 
         try:
-            parts = content.split(maxsplit=1)
-            if len(parts) < 2:
+            target = _tag_argument(content)
+            if not target:
                 raise ValueError("Missing target")
-            target = parts[1].strip()
 
             deal = None
             try:
@@ -1193,8 +1786,13 @@ async def on_message(message: discord.Message):
                 f"{deal.get('kw', 0):.1f} kW"
             )
 
+            _guild_index_remove(deal)
+            _day_agg_apply(deal, -1)
+            _user_index_remove(deal)
+            _customer_index_remove(deal)
+            _user_totals_forget(deal["id"])
             DEALS_DATA["deals"] = [d for d in DEALS_DATA["deals"] if d["id"] != deal["id"]]
-            _save_deals(DEALS_DATA)
+            await _log_deal_change({"op": "delete", "id": deal["id"]})
 
             await message.channel.send(f"🗑️ Deleted: {deal_info}")
             await _post_today_leaderboards(message.guild)
@@ -1214,7 +1812,8 @@ async def on_message(message: discord.Message):
             return
 
         DEALS_DATA["deals"] = [d for d in DEALS_DATA["deals"] if d.get("guild_id") != message.guild.id]
-        _save_deals(DEALS_DATA)
+        _drop_guild_indexes(message.guild.id)
+        await _log_deal_change({"op": "clear", "guild_id": message.guild.id})
         await message.channel.send("🔥 All deals for this server have been cleared. Fresh start!")
         await _post_today_leaderboards(message.guild)
         return
@@ -1227,6 +1826,15 @@ async def on_message(message: discord.Message):
 # ---------------------------------------------------------------
 
 
+DEAL_STATUS_SHORT = {
+    "sold": "✅ Sold",
+    "set": "🟡 Set",
+    "no_sale": "🚫 NoSale",
+    "canceled": "❌ Cancel",
+    "canceled_after_sign": "❌ Cancel",
+}
+
+
 @bot.command(name="deals")
 async def deals_cmd(ctx: commands.Context, period: str = "day", date_str: str | None = None):
     """!deals [day|week|month|all] - List all deals with their IDs."""
@@ -1276,8 +1884,7 @@ async def deals_cmd(ctx: commands.Context, period: str = "day", date_str: str |
     for d in guild_deals:
         did = d["id"]
         status = d.get("status", "sold")
-        status_short = {"sold": "✅ Sold", "set": "🟡 Set", "no_sale": "🚫 NoSale", 
-                       "canceled": "❌ Cancel", "canceled_after_sign": "❌ Cancel"}.get(status, status)
+        status_short = DEAL_STATUS_SHORT.get(status, status)
         closer = (d.get("closer_name") or "?")[:14]
         setter = (d.get("setter_name") or "?")[:14]
         kw = f"{d.get('kw', 0):.1f}" if d.get("kw") else "-"
@@ -1285,14 +1892,17 @@ async def deals_cmd(ctx: commands.Context, period: str = "day", date_str: str |
 
     msg = "\n".join(lines)
     if len(msg) > 1900:
-        chunk = ""
+        chunk: list[str] = []
+        chunk_len = 0
         for line in lines:
-            if len(chunk) + len(line) + 1 > 1900:
-                await ctx.send(chunk)
-                chunk = ""
-            chunk += line + "\n"
+            if chunk_len + len(line) + 1 > 1900:
+                await ctx.send("\n".join(chunk) + "\n")
+                chunk = []
+                chunk_len = 0
+            chunk.append(line)
+            chunk_len += len(line) + 1
         if chunk:
-            await ctx.send(chunk)
+            await ctx.send("\n".join(chunk) + "\n")
     else:
         await ctx.send(msg)
 
@@ -1322,8 +1932,9 @@ async def leaderboard_cmd(ctx: commands.Context, period: str = "day", date_str:
     else:
         base_dt = _now_local()
 
-    start_utc, end_utc, start_local, end_local, pretty = _period_bounds(period, base_dt)
-    deals = _filter_deals_period(ctx.guild.id, start_utc, end_utc)
+    _, _, start_local, end_local, pretty = _period_bounds(period, base_dt)
+    # The embed only shows the top rows, so skip sorting the rest
+    board = _board_for_days(ctx.guild.id, start_local.date(), end_local.date(), top=EMBED_TOP_N)
 
     if period in ("day", "today"):
         date_label = start_local.date().isoformat()
@@ -1332,7 +1943,7 @@ async def leaderboard_cmd(ctx: commands.Context, period: str = "day", date_str:
     else:
         date_label = f"{start_local.date()} → {(end_local - timedelta(days=1)).date()}"
 
-    embed = _build_leaderboard_embed(ctx.guild, deals, pretty, date_label, use_mentions=True)
+    embed = _build_leaderboard_embed(ctx.guild, board, pretty, date_label, use_mentions=True)
     await ctx.send(embed=embed)
 
 
@@ -1352,12 +1963,14 @@ async def mystats_cmd(ctx: commands.Context, period: str = "alltime"):
     user_name = ctx.author.display_name
 
     if period in ("alltime", "all"):
-        deals = _get_user_deals(ctx.guild.id, user_id, user_name)
+        # Running totals; no need to touch the deals at all
+        stats = _user_stats_alltime(ctx.guild.id, user_id, user_name)
         period_label = "All Time"
     else:
         base_dt = _now_local()
         start_utc, end_utc, start_local, end_local, _ = _period_bounds(period, base_dt)
         deals = _get_user_deals_period(ctx.guild.id, user_id, user_name, start_utc, end_utc)
+        stats = _user_stats(deals, user_id, user_name) if deals else None
 
         if period in ("day", "today"):
             period_label = f"Today ({start_local.date().isoformat()})"
@@ -1366,28 +1979,28 @@ async def mystats_cmd(ctx: commands.Context, period: str = "alltime"):
         else:
             period_label = f"This Month ({start_local.strftime('%Y-%m')})"
 
-    # Calculate stats
-    sold_deals = [d for d in deals if d.get("status") == "sold"]
-    set_deals = [d for d in deals if d.get("status") in ("set", "no_sale", "sold", "canceled_after_sign") and d.get("setter_id") == user_id]
-    no_sale_deals = [d for d in deals if d.get("status") == "no_sale" and d.get("closer_id") == user_id]
-    canceled_deals = [d for d in deals if d.get("status") == "canceled_after_sign" and d.get("closer_id") == user_id]
-    
-    closer_deals = [d for d in sold_deals if d.get("closer_id") == user_id]
-    setter_deals = [d for d in sold_deals if d.get("setter_id") == user_id or
-                   (d.get("setter_name", "").lower().strip() == user_name.lower().strip() and d.get("closer_id") != user_id)]
+    # Nothing to show; skip building the embed
+    if stats is None or not (
+        stats["appts"] or stats["closed"] or stats["no_sale"]
+        or stats["canceled"] or stats["setter_sold"]
+    ):
+        await ctx.send(f"No activity found for **{period_label}**.")
+        return
+
+    appts_set = stats["appts"]
+    closed_count = stats["closed"]
+    no_sale_count = stats["no_sale"]
+    canceled_count = stats["canceled"]
+    setter_count = stats["setter_sold"]
+    total_kw = stats["kw"]
+    setter_kw = stats["setter_kw"]
+    loss_counts = stats["loss"]
+
+    # Revenue is a flat $/kW, so one multiply covers every deal
+    total_rev = _compute_revenue(total_kw) or 0.0
 
-    total_kw = sum(float(d.get("kw") or 0.0) for d in closer_deals)
-    total_rev = sum(_compute_revenue(float(d.get("kw") or 0.0)) or 0.0 for d in closer_deals)
-    
     # Close rate
-    appts_set = len(set_deals)
-    close_rate = (len(closer_deals) / appts_set * 100) if appts_set > 0 else 0.0
-    
-    # Loss reason breakdown
-    loss_counts: Dict[str, int] = {}
-    for d in no_sale_deals:
-        code = d.get("loss_reason") or "other"
-        loss_counts[code] = loss_counts.get(code, 0) + 1
+    close_rate = (closed_count / appts_set * 100) if appts_set > 0 else 0.0
 
     embed = discord.Embed(
         title=f"📊 Stats for {ctx.author.display_name}",
@@ -1396,19 +2009,18 @@ async def mystats_cmd(ctx: commands.Context, period: str = "alltime"):
     )
     
     embed.add_field(name="📞 Appointments Set", value=str(appts_set), inline=True)
-    embed.add_field(name="✅ Deals Closed", value=str(len(closer_deals)), inline=True)
+    embed.add_field(name="✅ Deals Closed", value=str(closed_count), inline=True)
     embed.add_field(name="📈 Close Rate", value=f"{close_rate:.1f}%", inline=True)
     
-    embed.add_field(name="🚫 No-sales", value=str(len(no_sale_deals)), inline=True)
-    embed.add_field(name="❌ Canceled", value=str(len(canceled_deals)), inline=True)
+    embed.add_field(name="🚫 No-sales", value=str(no_sale_count), inline=True)
+    embed.add_field(name="❌ Canceled", value=str(canceled_count), inline=True)
     embed.add_field(name="⚡ Total kW", value=f"{total_kw:.1f}", inline=True)
 
     if CONFIG_DATA.get("revenue_enabled"):
         embed.add_field(name="💰 Est. Revenue", value=f"${total_rev:,.2f}", inline=True)
     
-    if setter_deals:
-        setter_kw = sum(float(d.get("kw") or 0.0) for d in setter_deals)
-        embed.add_field(name="📋 As Setter (Sold)", value=f"{len(setter_deals)} deals ({setter_kw:.1f} kW)", inline=True)
+    if setter_count:
+        embed.add_field(name="📋 As Setter (Sold)", value=f"{setter_count} deals ({setter_kw:.1f} kW)", inline=True)
 
     # Loss breakdown
     if loss_counts:
@@ -1439,15 +2051,22 @@ async def today_stats_cmd(ctx: commands.Context):
     start_utc, end_utc, _, _, _ = _period_bounds("day", now)
     deals = _filter_deals_period(ctx.guild.id, start_utc, end_utc, include_canceled=True)
 
-    sets = len([d for d in deals if d.get("status") in ("set", "no_sale")])
-    sold = len([d for d in deals if d.get("status") == "sold"])
-    total_kw = sum(float(d.get("kw") or 0.0) for d in deals if d.get("status") == "sold")
-    total_rev = sum(_compute_revenue(float(d.get("kw") or 0.0)) or 0.0 for d in deals if d.get("status") == "sold")
+    sets = 0
+    sold = 0
+    total_kw = 0.0
+    for d in deals:
+        status = d.get("status")
+        if status == "sold":
+            sold += 1
+            total_kw += float(d.get("kw") or 0.0)
+        elif status in OPEN_OR_LOST_STATUSES:
+            sets += 1
+    total_rev = _compute_revenue(total_kw) or 0.0
 
     embed = discord.Embed(
         title="📅 Today's Performance",
-        color=discord.Color.green(),
-        timestamp=_now_utc(),
+        color=GREEN,
+        timestamp=now,
     )
     embed.add_field(name="📞 Appointments Set", value=str(sets), inline=True)
     embed.add_field(name="✅ Deals Closed", value=str(sold), inline=True)
@@ -1470,31 +2089,38 @@ async def pending_deals_cmd(ctx: commands.Context):
         await ctx.send("✅ No pending appointments!")
         return
 
+    # One description block instead of an embed field per deal.
+    # created_ts is backfilled on load, so no ISO strings are parsed here.
+    lines = [f"{len(pending)} appointment(s) waiting to be closed", ""]
+    for d in heapq.nsmallest(10, pending, key=lambda x: x.get("created_ts") or 0):
+        created_ts = d.get("created_ts")
+        if created_ts is not None:
+            created_str = datetime.fromtimestamp(created_ts, timezone.utc).strftime("%m/%d %H:%M")
+        else:
+            created_str = "N/A"
+        lines.append(
+            f"**{d.get('customer_name', 'Unknown')}** – "
+            f"Setter: {d.get('setter_name', 'Unknown')} – Created: {created_str}"
+        )
+
     embed = discord.Embed(
         title="🔔 Pending Appointments",
-        description=f"{len(pending)} appointment(s) waiting to be closed",
-        color=discord.Color.orange(),
+        description="\n".join(lines),
+        color=ORANGE,
         timestamp=_now_utc(),
     )
 
-    for d in sorted(pending, key=lambda x: x.get("created_at", ""))[:10]:
-        created = d.get("created_at")
-        try:
-            created_str = datetime.fromisoformat(created).strftime("%m/%d %H:%M")
-        except Exception:
-            created_str = "N/A"
-        embed.add_field(
-            name=f"{d.get('customer_name', 'Unknown')}",
-            value=f"Setter: {d.get('setter_name', 'Unknown')}\nCreated: {created_str}",
-            inline=True,
-        )
-
     if len(pending) > 10:
         embed.set_footer(text=f"Showing 10 of {len(pending)} pending deals")
 
     await ctx.send(embed=embed)
 
 
+def _write_csv(filename: str, rows: List[list]):
+    with open(filename, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows(rows)
+
+
 @bot.command(name="export_csv")
 async def export_csv_cmd(ctx: commands.Context, period: str = "all"):
     """!export_csv [day|week|month|all] - Export deals to CSV (admin only)."""
@@ -1515,30 +2141,30 @@ async def export_csv_cmd(ctx: commands.Context, period: str = "all"):
         start_utc, end_utc, _, _, _ = _period_bounds(period, now)
         guild_deals = _filter_deals_period(ctx.guild.id, start_utc, end_utc, include_canceled=True)
 
-    filename = f"/tmp/deals_{period}_{int(_now_utc().timestamp())}.csv"
-    with open(filename, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            "Deal ID", "Customer", "Setter", "Closer", "Status", "kW",
-            "Revenue", "Loss Reason", "Created At", "Closed At", "Canceled At"
+    filename = f"/tmp/deals_{period}_{int(now.timestamp())}.csv"
+    rows = [[
+        "Deal ID", "Customer", "Setter", "Closer", "Status", "kW",
+        "Revenue", "Loss Reason", "Created At", "Closed At", "Canceled At"
+    ]]
+    # Resolve the rate once; per row revenue is then a single multiply
+    rate = _REVENUE_PER_KW or 0.0
+    for d in guild_deals:
+        kw = float(d.get("kw") or 0.0)
+        rev = kw * rate
+        rows.append([
+            d.get("id"),
+            d.get("customer_name"),
+            d.get("setter_name"),
+            d.get("closer_name"),
+            d.get("status"),
+            kw if kw else "",
+            rev if rev else "",
+            d.get("loss_reason_detail") or d.get("loss_reason") or "",
+            d.get("created_at") or "",
+            d.get("closed_at") or "",
+            d.get("canceled_at") or "",
         ])
-
-        for d in guild_deals:
-            kw = float(d.get("kw") or 0.0)
-            rev = _compute_revenue(kw) or 0.0
-            writer.writerow([
-                d.get("id"),
-                d.get("customer_name"),
-                d.get("setter_name"),
-                d.get("closer_name"),
-                d.get("status"),
-                kw if kw else "",
-                rev if rev else "",
-                d.get("loss_reason_detail") or d.get("loss_reason") or "",
-                d.get("created_at") or "",
-                d.get("closed_at") or "",
-                d.get("canceled_at") or "",
-            ])
+    await asyncio.get_running_loop().run_in_executor(_IO_EXECUTOR, _write_csv, filename, rows)
 
     await ctx.send(
         f"📁 Exported {len(guild_deals)} deals for **{period}**.",
@@ -1568,7 +2194,7 @@ async def set_revenue_cmd(ctx: commands.Context, value: str = None):
     if value in {"off", "0", "none", "disable"}:
         CONFIG_DATA["revenue_enabled"] = False
         CONFIG_DATA["revenue_per_kw"] = 0.0
-        _save_config(CONFIG_DATA)
+        await _save_config(CONFIG_DATA)
         await ctx.send("💸 Revenue display has been **disabled**.")
         return
 
@@ -1580,7 +2206,7 @@ async def set_revenue_cmd(ctx: commands.Context, value: str = None):
 
     CONFIG_DATA["revenue_enabled"] = True
     CONFIG_DATA["revenue_per_kw"] = kw_value
-    _save_config(CONFIG_DATA)
+    await _save_config(CONFIG_DATA)
     await ctx.send(f"💸 Revenue enabled at **${kw_value:.2f} per kW**.")
 
 
@@ -1604,13 +2230,13 @@ async def set_ghl_cmd(ctx: commands.Context, webhook_url: str = None):
     if webhook_url.lower() in {"off", "disable", "none"}:
         CONFIG_DATA["ghl_enabled"] = False
         CONFIG_DATA["ghl_webhook"] = None
-        _save_config(CONFIG_DATA)
+        await _save_config(CONFIG_DATA)
         await ctx.send("🔗 GHL webhook has been **disabled**.")
         return
 
     CONFIG_DATA["ghl_enabled"] = True
     CONFIG_DATA["ghl_webhook"] = webhook_url
-    _save_config(CONFIG_DATA)
+    await _save_config(CONFIG_DATA)
     await ctx.send("🔗 GHL webhook has been **enabled**. Events will be sent to your webhook.")
 
 
@@ -1,9 +1,17 @@
 import os
-import json
-from datetime import datetime, timedelta, timezone
+import asyncio
+import heapq
+import itertools
+import math
+import re
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from functools import lru_cache
+from datetime import date, datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 
 import discord
+import orjson
 from discord.ext import commands
 
 # ------------------------
@@ -30,31 +38,243 @@ DATA_DIR = "./data"
 os.makedirs(DATA_DIR, exist_ok=True)
 
 DEALS_FILE = os.path.join(DATA_DIR, "deals.json")
+# Append-only change log replayed on top of DEALS_FILE at startup.
+# DEALS_FILE is only rewritten by the periodic snapshot.
+DEALS_LOG = os.path.join(DATA_DIR, "deals.log")
+SNAPSHOT_INTERVAL = 300  # seconds
+
+
+def _apply_log_entry(data: dict, entry: dict):
+    """Replay one deals.log entry onto the loaded data."""
+    op = entry.get("op")
+    deals = data["deals"]
+    if op == "add":
+        deal = entry["deal"]
+        deals[:] = [d for d in deals if d["id"] != deal["id"]]
+        deals.append(deal)
+        data["next_id"] = max(data["next_id"], deal["id"] + 1)
+    elif op == "cancel":
+        for d in deals:
+            if d["id"] == entry["id"]:
+                d["status"] = "canceled"
+                d["canceled_at"] = entry.get("canceled_at")
+                break
+    elif op == "delete":
+        deals[:] = [d for d in deals if d["id"] != entry["id"]]
+    elif op == "clear":
+        deals[:] = [d for d in deals if d.get("guild_id") != entry["guild_id"]]
+    elif op == "lb_msg":
+        msg_ids = data.setdefault("leaderboard_msg_ids", {})
+        msg_ids.setdefault(str(entry["guild_id"]), {})[entry["kind"]] = entry["msg_id"]
+
+
+def _replay_log(data: dict):
+    if not os.path.exists(DEALS_LOG):
+        return
+    with open(DEALS_LOG, "rb") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                _apply_log_entry(data, orjson.loads(line))
+            except Exception:
+                # A torn last line from a crash mid-write; nothing after it
+                # can have been acknowledged, so stop here.
+                break
 
 
 def _load_deals():
-    if not os.path.exists(DEALS_FILE):
-        return {"next_id": 1, "deals": []}
-    try:
-        with open(DEALS_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        if "next_id" not in data:
-            data["next_id"] = 1
-        if "deals" not in data:
-            data["deals"] = []
-        return data
-    except Exception:
-        return {"next_id": 1, "deals": []}
+    data = {"next_id": 1, "deals": [], "leaderboard_msg_ids": {}}
+    if os.path.exists(DEALS_FILE):
+        try:
+            with open(DEALS_FILE, "rb") as f:
+                data = orjson.loads(f.read())
+            if "next_id" not in data:
+                data["next_id"] = 1
+            if "deals" not in data:
+                data["deals"] = []
+            if "leaderboard_msg_ids" not in data:
+                data["leaderboard_msg_ids"] = {}
+        except Exception:
+            data = {"next_id": 1, "deals": [], "leaderboard_msg_ids": {}}
+    _replay_log(data)
+    # Backfill epoch seconds for deals logged before created_ts existed
+    for d in data["deals"]:
+        if d.get("created_ts") is None and d.get("created_at"):
+            try:
+                d["created_ts"] = datetime.fromisoformat(d["created_at"]).timestamp()
+            except Exception:
+                pass
+        if "customer_key" not in d:
+            d["customer_key"] = _customer_key(d.get("customer_name") or "")
+        # Older files can hold kw as a string or null; convert once here so
+        # the aggregation paths can use d["kw"] directly.
+        d["kw"] = float(d.get("kw") or 0.0)
+    return data
 
 
 def _save_deals(data):
     tmp = DEALS_FILE + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    data_bytes = orjson.dumps(data)
+    with open(tmp, "wb") as f:
+        f.write(data_bytes)
     os.replace(tmp, DEALS_FILE)
 
 
+_log_fh = open(DEALS_LOG, "ab")
+
+
+def _log_append(entry: dict):
+    """Record one change in deals.log instead of rewriting the whole file."""
+    _log_fh.write(orjson.dumps(entry) + b"\n")
+    _log_fh.flush()
+
+
+# Ids removed by #clearleaderboard that are still in DEALS_DATA["deals"]
+_dropped_ids: set[int] = set()
+
+
+def _snapshot_deals():
+    """Write a full snapshot and truncate the log it now covers."""
+    if _log_fh.tell() == 0:
+        return
+    if _dropped_ids:
+        DEALS_DATA["deals"] = [
+            d for d in DEALS_DATA["deals"] if d["id"] not in _dropped_ids
+        ]
+        _dropped_ids.clear()
+    _save_deals(DEALS_DATA)
+    _log_fh.seek(0)
+    _log_fh.truncate()
+
+
+async def _snapshot_loop():
+    while True:
+        await asyncio.sleep(SNAPSHOT_INTERVAL)
+        try:
+            _snapshot_deals()
+        except Exception as e:
+            print(f"[_snapshot_loop] snapshot failed: {e}")
+
+
+# ------------------------
+# In-memory indexes
+# ------------------------
+
+# Per-guild deals kept sorted by created_ts, with the parallel list of
+# timestamps so period lookups can bisect instead of scanning.
+_by_guild: dict[int, list[dict]] = {}
+_ts_by_guild: dict[int, list[float]] = {}
+
+# AGG[guild_id][closer_id]["YYYY-MM-DD"] = {"deals": n, "kw": f}
+# Days are Central Time, so a day/week/month board only has to sum
+# a handful of day-buckets instead of re-walking every deal.
+AGG: dict[int, dict[int, dict[str, dict]]] = {}
+# NAMES[guild_id][closer_id] = latest closer display name
+NAMES: dict[int, dict[int, str]] = {}
+# CUSTOMER_INDEX[guild_id][customer_key] = that customer's deals, oldest first
+CUSTOMER_INDEX: dict[int, dict[str, list[dict]]] = {}
+
+
+def _customer_key(customer_name: str) -> str:
+    return customer_name.strip().lower()
+
+
+def _agg_apply(deal: dict, sign: int):
+    """Add (sign=1) or remove (sign=-1) a closed deal from AGG."""
+    if deal.get("status", "closed") != "closed":
+        return
+    created_ts = deal.get("created_ts")
+    if created_ts is None:
+        return
+    day = datetime.fromtimestamp(created_ts, LOCAL_TZ).date().isoformat()
+    guild_id = deal.get("guild_id")
+    closer_id = deal.get("closer_id")
+
+    buckets = AGG.setdefault(guild_id, {}).setdefault(closer_id, {})
+    bucket = buckets.setdefault(day, {"deals": 0, "kw": 0.0})
+    bucket["deals"] += sign
+    bucket["kw"] += sign * deal["kw"]
+    if bucket["deals"] <= 0:
+        del buckets[day]
+
+    if sign > 0:
+        NAMES.setdefault(guild_id, {})[closer_id] = deal.get("closer_name", "Unknown")
+
+
+def _index_add(deal: dict):
+    guild_id = deal.get("guild_id")
+    ts = deal.get("created_ts") or 0.0
+    deals = _by_guild.setdefault(guild_id, [])
+    keys = _ts_by_guild.setdefault(guild_id, [])
+    if not keys or keys[-1] <= ts:
+        # New deals are always the latest, so this is the normal path
+        deals.append(deal)
+        keys.append(ts)
+    else:
+        idx = bisect_right(keys, ts)
+        deals.insert(idx, deal)
+        keys.insert(idx, ts)
+    _agg_apply(deal, 1)
+
+    by_customer = CUSTOMER_INDEX.setdefault(guild_id, {}).setdefault(
+        deal["customer_key"], []
+    )
+    by_customer.append(deal)
+    if len(by_customer) > 1 and (by_customer[-2].get("created_ts") or 0.0) > ts:
+        by_customer.sort(key=lambda d: d.get("created_ts") or 0.0)
+
+
+def _index_remove(deal: dict):
+    guild_id = deal.get("guild_id")
+    _agg_apply(deal, -1)
+    by_customer = CUSTOMER_INDEX.get(guild_id, {}).get(deal["customer_key"])
+    if by_customer:
+        by_customer[:] = [d for d in by_customer if d is not deal]
+        if not by_customer:
+            del CUSTOMER_INDEX[guild_id][deal["customer_key"]]
+    keys = _ts_by_guild.get(guild_id)
+    if not keys:
+        return
+    deals = _by_guild[guild_id]
+    ts = deal.get("created_ts") or 0.0
+    idx = bisect_left(keys, ts)
+    while idx < len(keys) and keys[idx] == ts:
+        if deals[idx] is deal:
+            del deals[idx]
+            del keys[idx]
+            return
+        idx += 1
+
+
+def _index_drop_guild(guild_id: int):
+    _by_guild.pop(guild_id, None)
+    _ts_by_guild.pop(guild_id, None)
+    AGG.pop(guild_id, None)
+    NAMES.pop(guild_id, None)
+    CUSTOMER_INDEX.pop(guild_id, None)
+
+
+def _rebuild_indexes(deals: list[dict]):
+    """One pass over all deals to seed the indexes at startup."""
+    _by_guild.clear()
+    _ts_by_guild.clear()
+    AGG.clear()
+    NAMES.clear()
+    CUSTOMER_INDEX.clear()
+    for d in sorted(deals, key=lambda d: d.get("created_ts") or 0.0):
+        _index_add(d)
+
+
 DEALS_DATA = _load_deals()
+_rebuild_indexes(DEALS_DATA["deals"])
+
+# Deal ids are handed out by a counter seeded from the loaded data;
+# DEALS_DATA["next_id"] is kept in step for the snapshot.
+_next_id = itertools.count(DEALS_DATA["next_id"])
+# Held around each handler's lookup + mutation of a guild's deals
+_guild_locks: defaultdict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
 
 # ------------------------
 # Discord bot setup
@@ -74,6 +294,42 @@ LEADERBOARD_CHANNELS = {
     "monthly-leaderboard": "Monthly sales leaderboard (read-only)",
 }
 
+# #sold @Setter Customer Name kW   /   #sold SetterName Customer Name kW
+_SOLD_RE = re.compile(
+    r"^#sold\s+(?:<@!?(?P<mention>\d+)>|(?P<setter>\S+))"
+    r"\s+(?P<customer>.+?)\s+(?P<kw>\d+(?:\.\d+)?)\s*$",
+    re.IGNORECASE,
+)
+
+# (guild_id, channel name) -> channel id, so refreshes don't rescan
+# every text channel in the server
+_chan_cache: dict[tuple[int, str], int] = {}
+
+
+def _get_lb_channel(guild: discord.Guild, name: str):
+    """Return the leaderboard channel called `name`, or None."""
+    key = (guild.id, name)
+    cid = _chan_cache.get(key)
+    if cid is not None:
+        chan = guild.get_channel(cid)
+        if chan is not None and chan.name == name:
+            return chan
+        _chan_cache.pop(key, None)
+    chan = discord.utils.get(guild.text_channels, name=name)
+    if chan is not None:
+        _chan_cache[key] = chan.id
+    return chan
+
+
+def _forget_lb_channel(channel):
+    """Drop any cache entry that points at this channel."""
+    guild = getattr(channel, "guild", None)
+    if guild is None:
+        return
+    for name in LEADERBOARD_CHANNELS:
+        if _chan_cache.get((guild.id, name)) == channel.id:
+            del _chan_cache[(guild.id, name)]
+
 # ------------------------
 # Helpers
 # ------------------------
@@ -88,7 +344,8 @@ def _parse_date(date_str: str):
 
 
 def _get_guild_deals(guild_id: int):
-    return [d for d in DEALS_DATA["deals"] if d.get("guild_id") == guild_id]
+    """All deals for this guild, oldest first. Do not mutate the result."""
+    return _by_guild.get(guild_id, [])
 
 
 def _add_deal(
@@ -100,8 +357,9 @@ def _add_deal(
     customer_name: str,
     kw: float,
 ):
-    deal_id = DEALS_DATA.get("next_id", 1)
+    deal_id = next(_next_id)
     DEALS_DATA["next_id"] = deal_id + 1
+    now = _now_utc()
 
     deal = {
         "id": deal_id,
@@ -111,31 +369,25 @@ def _add_deal(
         "closer_id": closer_id,
         "closer_name": closer_name,
         "customer_name": customer_name,
+        # normalized once here so #cancel/#delete lookups are a dict hit
+        "customer_key": _customer_key(customer_name),
         "kw": float(kw),
         "status": "closed",  # closed | canceled | deleted
         # stored in UTC so it’s unambiguous
-        "created_at": _now_utc().isoformat(),
+        "created_at": now.isoformat(),
+        # epoch seconds, used as the sort/bisect key for period lookups
+        "created_ts": now.timestamp(),
     }
     DEALS_DATA["deals"].append(deal)
-    _save_deals(DEALS_DATA)
+    _index_add(deal)
+    _log_append({"op": "add", "deal": deal})
     return deal
 
 
 def _find_latest_deal_by_customer(guild_id: int, customer_name: str):
     """Return the most recent deal for this customer in this guild, or None."""
-    customer_lower = customer_name.strip().lower()
-    candidates = [
-        d
-        for d in _get_guild_deals(guild_id)
-        if d.get("customer_name", "").strip().lower() == customer_lower
-    ]
-    if not candidates:
-        return None
-    candidates.sort(
-        key=lambda d: d.get("created_at") or "",
-        reverse=True,
-    )
-    return candidates[0]
+    lst = CUSTOMER_INDEX.get(guild_id, {}).get(_customer_key(customer_name))
+    return lst[-1] if lst else None
 
 
 def _filter_deals_period(
@@ -144,46 +396,56 @@ def _filter_deals_period(
     end_utc: datetime,
     include_canceled: bool = False,
 ):
-    deals = _get_guild_deals(guild_id)
+    keys = _ts_by_guild.get(guild_id)
+    if not keys:
+        return []
+    lo = bisect_left(keys, start_utc.timestamp())
+    hi = bisect_left(keys, end_utc.timestamp(), lo)
     result = []
-    for d in deals:
+    for d in _by_guild[guild_id][lo:hi]:
         status = d.get("status", "closed")
         if status == "deleted":
             continue
         if not include_canceled and status == "canceled":
             continue
-        created_raw = d.get("created_at")
-        if not created_raw:
-            continue
-        try:
-            created = datetime.fromisoformat(created_raw)
-        except Exception:
+        if d.get("created_ts") is None:
             continue
-        if start_utc <= created < end_utc:
-            result.append(d)
+        result.append(d)
     return result
 
 
-def _aggregate_by_closer(deals: list[dict]):
-    """Return list of {name, deals, kw} sorted by deals then kw desc."""
-    stats: dict[int | None, dict] = {}
-    for d in deals:
-        cid = d.get("closer_id")
-        if cid not in stats:
-            stats[cid] = {
-                "name": d.get("closer_name", "Unknown"),
-                "deals": 0,
-                "kw": 0.0,
-            }
-        stats[cid]["deals"] += 1
-        stats[cid]["kw"] += float(d.get("kw") or 0.0)
-    out = list(stats.values())
-    out.sort(key=lambda x: (x["deals"], x["kw"]), reverse=True)
-    return out
+def _rank_key(row: dict):
+    return (row["deals"], row["kw"])
+
+
+def _aggregate_from_index(guild_id: int, start_date: date, end_date: date):
+    """
+    Return the top 10 closers as {name, deals, kw}, by deals then kw desc.
+    Sums the AGG day-buckets in [start_date, end_date) instead of walking deals.
+    """
+    days = []
+    day = start_date
+    while day < end_date:
+        days.append(day.isoformat())
+        day += timedelta(days=1)
+
+    names = NAMES.get(guild_id, {})
+    out = []
+    for cid, buckets in AGG.get(guild_id, {}).items():
+        deals = 0
+        kw = 0.0
+        for key in days:
+            bucket = buckets.get(key)
+            if bucket:
+                deals += bucket["deals"]
+                kw += bucket["kw"]
+        if deals:
+            out.append({"name": names.get(cid, "Unknown"), "deals": deals, "kw": kw})
+    return heapq.nlargest(10, out, key=_rank_key)
 
 
 def _aggregate_by_setter(deals: list[dict]):
-    """Return list of {name, deals, kw} sorted by deals then kw desc for setters."""
+    """Return the top 10 setters as {name, deals, kw}, by deals then kw desc."""
     stats: dict[str, dict] = {}
     for d in deals:
         name = (d.get("setter_name") or "").strip()
@@ -197,10 +459,8 @@ def _aggregate_by_setter(deals: list[dict]):
                 "kw": 0.0,
             }
         stats[key]["deals"] += 1
-        stats[key]["kw"] += float(d.get("kw") or 0.0)
-    out = list(stats.values())
-    out.sort(key=lambda x: (x["deals"], x["kw"]), reverse=True)
-    return out
+        stats[key]["kw"] += d["kw"]
+    return heapq.nlargest(10, stats.values(), key=_rank_key)
 
 
 def _period_bounds(kind: str, base_dt: datetime):
@@ -210,9 +470,14 @@ def _period_bounds(kind: str, base_dt: datetime):
       (start_utc, end_utc, start_local, end_local)
     where boundaries are midnight LOCAL_TZ.
     """
-    kind = kind.lower()
-    base_local = base_dt.astimezone(LOCAL_TZ)
-    d = base_local.date()
+    d = base_dt.astimezone(LOCAL_TZ).date()
+    return _period_bounds_cached(kind.lower(), d.year, d.month, d.day)
+
+
+@lru_cache(maxsize=512)
+def _period_bounds_cached(kind: str, year: int, month: int, day: int):
+    """Bounds only depend on the local calendar day, so repeats are cached."""
+    d = date(year, month, day)
 
     if kind in ("day", "today"):
         start_local = datetime(d.year, d.month, d.day, tzinfo=LOCAL_TZ)
@@ -240,9 +505,24 @@ def _period_bounds(kind: str, base_dt: datetime):
     return start_utc, end_utc, start_local, end_local, pretty_kind
 
 
+_MEDALS = ("🥇", "🥈", "🥉")
+
+
+def _rank_lines(rows: list[dict]) -> str:
+    """Render up to 10 ranked {name, deals, kw} rows as one field value."""
+    return "\n".join(
+        [
+            f"{_MEDALS[idx] if idx < 3 else f'{idx+1}.'} **{row['name']}** – "
+            f"{row['deals']} deal(s), {row['kw']:.1f} kW"
+            for idx, row in enumerate(rows[:10])
+        ]
+    )
+
+
 def _build_leaderboard_embed(
     guild: discord.Guild,
     deals: list[dict],
+    by_closer: list[dict],
     period_label: str,
     date_label: str,
 ):
@@ -261,29 +541,15 @@ def _build_leaderboard_embed(
         return embed
 
     # Closers
-    by_closer = _aggregate_by_closer(deals)
-    closer_lines = []
-    medals = ["🥇", "🥈", "🥉"]
-    for idx, row in enumerate(by_closer[:10]):
-        icon = medals[idx] if idx < len(medals) else f"{idx+1}."
-        closer_lines.append(
-            f"{icon} **{row['name']}** – {row['deals']} deal(s), {row['kw']:.1f} kW"
-        )
-    embed.add_field(name="Top Closers", value="\n".join(closer_lines), inline=False)
+    embed.add_field(name="Top Closers", value=_rank_lines(by_closer), inline=False)
 
     # Setters
     by_setter = _aggregate_by_setter(deals)
     if by_setter:
-        setter_lines = []
-        for idx, row in enumerate(by_setter[:10]):
-            icon = medals[idx] if idx < len(medals) else f"{idx+1}."
-            setter_lines.append(
-                f"{icon} **{row['name']}** – {row['deals']} deal(s), {row['kw']:.1f} kW"
-            )
-        embed.add_field(name="Top Setters", value="\n".join(setter_lines), inline=False)
+        embed.add_field(name="Top Setters", value=_rank_lines(by_setter), inline=False)
 
     total_deals = len(deals)
-    total_kw = sum(float(d.get("kw") or 0.0) for d in deals)
+    total_kw = math.fsum(d["kw"] for d in deals)
 
     embed.add_field(
         name="Totals",
@@ -297,6 +563,27 @@ def _build_leaderboard_embed(
     return embed
 
 
+# Lock down send + thread creation for everyone.
+_EVERYONE_OVERWRITE = discord.PermissionOverwrite(
+    view_channel=True,
+    read_message_history=True,
+    send_messages=False,
+    add_reactions=False,
+    create_public_threads=False,
+    create_private_threads=False,
+    create_forum_threads=False,
+    send_messages_in_threads=False,
+)
+_BOT_OVERWRITE = discord.PermissionOverwrite(
+    view_channel=True,
+    read_message_history=True,
+    send_messages=True,
+    embed_links=True,
+    manage_messages=True,
+    send_messages_in_threads=True,
+)
+
+
 async def ensure_leaderboard_channels(guild: discord.Guild):
     """Create / fix the three read-only leaderboard channels."""
     try:
@@ -305,37 +592,29 @@ async def ensure_leaderboard_channels(guild: discord.Guild):
             return
         everyone = guild.default_role
 
-        # Lock down send + thread creation for everyone.
         overwrites = {
-            everyone: discord.PermissionOverwrite(
-                view_channel=True,
-                read_message_history=True,
-                send_messages=False,
-                add_reactions=False,
-                create_public_threads=False,
-                create_private_threads=False,
-                create_forum_threads=False,
-                send_messages_in_threads=False,
-            ),
-            bot_member: discord.PermissionOverwrite(
-                view_channel=True,
-                read_message_history=True,
-                send_messages=True,
-                embed_links=True,
-                manage_messages=True,
-                send_messages_in_threads=True,
-            ),
+            everyone: _EVERYONE_OVERWRITE,
+            bot_member: _BOT_OVERWRITE,
         }
 
         for name, topic in LEADERBOARD_CHANNELS.items():
-            chan = discord.utils.get(guild.text_channels, name=name)
+            chan = _get_lb_channel(guild, name)
             if chan is None:
-                await guild.create_text_channel(
+                chan = await guild.create_text_channel(
                     name,
                     topic=topic,
                     overwrites=overwrites,
                 )
+                _chan_cache[(guild.id, name)] = chan.id
             else:
+                current = chan.overwrites
+                if (
+                    chan.topic == topic
+                    and current.get(everyone) == _EVERYONE_OVERWRITE
+                    and current.get(bot_member) == _BOT_OVERWRITE
+                ):
+                    # Already set up; skip the PATCH
+                    continue
                 await chan.edit(topic=topic, overwrites=overwrites)
     except discord.Forbidden:
         return
@@ -343,45 +622,87 @@ async def ensure_leaderboard_channels(guild: discord.Guild):
         print(f"[ensure_leaderboard_channels] error in guild {guild.id}: {e}")
 
 
+async def _upsert_leaderboard_message(
+    guild: discord.Guild,
+    chan: discord.TextChannel,
+    kind: str,
+    embed: discord.Embed,
+):
+    """Edit the stored leaderboard message for `kind`, or post a new one."""
+    guild_msgs = DEALS_DATA["leaderboard_msg_ids"].setdefault(str(guild.id), {})
+    msg_id = guild_msgs.get(kind)
+    if msg_id is not None:
+        try:
+            await chan.get_partial_message(msg_id).edit(embed=embed)
+            return
+        except discord.NotFound:
+            # Someone deleted it; post a replacement below
+            pass
+
+    msg = await chan.send(embed=embed)
+    guild_msgs[kind] = msg.id
+    _log_append(
+        {"op": "lb_msg", "guild_id": guild.id, "kind": kind, "msg_id": msg.id}
+    )
+
+
 async def _post_today_leaderboards(guild: discord.Guild):
-    """Recalculate today/week/month and drop fresh messages in the three channels."""
+    """Recalculate today/week/month and update the posts in the three channels."""
     now_local = _now_local()
 
     # Day
-    start_day_utc, end_day_utc, start_day_local, _, _ = _period_bounds("day", now_local)
+    start_day_utc, end_day_utc, start_day_local, end_day_local, _ = _period_bounds(
+        "day", now_local
+    )
     deals_day = _filter_deals_period(guild.id, start_day_utc, end_day_utc)
+    closers_day = _aggregate_from_index(
+        guild.id, start_day_local.date(), end_day_local.date()
+    )
 
     # Week
     start_week_utc, end_week_utc, start_week_local, end_week_local, _ = _period_bounds(
         "week", now_local
     )
     deals_week = _filter_deals_period(guild.id, start_week_utc, end_week_utc)
+    closers_week = _aggregate_from_index(
+        guild.id, start_week_local.date(), end_week_local.date()
+    )
 
     # Month
     (
         start_month_utc,
         end_month_utc,
         start_month_local,
-        _,
+        end_month_local,
         _,
     ) = _period_bounds("month", now_local)
     deals_month = _filter_deals_period(guild.id, start_month_utc, end_month_utc)
+    closers_month = _aggregate_from_index(
+        guild.id, start_month_local.date(), end_month_local.date()
+    )
 
     channel_map = {}
     for name in LEADERBOARD_CHANNELS.keys():
-        chan = discord.utils.get(guild.text_channels, name=name)
+        chan = _get_lb_channel(guild, name)
         if chan:
             channel_map[name] = chan
 
+    posts = []
+
     # Daily
     if "daily-leaderboard" in channel_map:
         emb = _build_leaderboard_embed(
             guild,
             deals_day,
+            closers_day,
             "Daily Leaderboard",
             start_day_local.date().isoformat(),
         )
-        await channel_map["daily-leaderboard"].send(embed=emb)
+        posts.append(
+            _upsert_leaderboard_message(
+                guild, channel_map["daily-leaderboard"], "daily", emb
+            )
+        )
 
     # Weekly
     if "weekly-leaderboard" in channel_map:
@@ -392,10 +713,15 @@ async def _post_today_leaderboards(guild: discord.Guild):
         emb = _build_leaderboard_embed(
             guild,
             deals_week,
+            closers_week,
             "Weekly Leaderboard",
             week_label,
         )
-        await channel_map["weekly-leaderboard"].send(embed=emb)
+        posts.append(
+            _upsert_leaderboard_message(
+                guild, channel_map["weekly-leaderboard"], "weekly", emb
+            )
+        )
 
     # Monthly
     if "monthly-leaderboard" in channel_map:
@@ -403,97 +729,83 @@ async def _post_today_leaderboards(guild: discord.Guild):
         emb = _build_leaderboard_embed(
             guild,
             deals_month,
+            closers_month,
             "Monthly Leaderboard",
             month_label,
         )
-        await channel_map["monthly-leaderboard"].send(embed=emb)
+        posts.append(
+            _upsert_leaderboard_message(
+                guild, channel_map["monthly-leaderboard"], "monthly", emb
+            )
+        )
 
+    # Different channels have separate rate limits, so post all three at once
+    results = await asyncio.gather(*posts, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"[_post_today_leaderboards] error in guild {guild.id}: {result}")
 
-# ------------------------
-# Events
-# ------------------------
 
+# Trailing-edge debounce: a burst of #sold / #cancel within the delay
+# window produces a single leaderboard refresh for the guild.
+LEADERBOARD_REFRESH_DELAY = 3.0
+_pending_refresh: dict[int, asyncio.Task] = {}
 
-@bot.event
-async def on_ready():
-    print(f"{bot.user} has connected to Discord!")
-    print(f"Guilds: {[g.name for g in bot.guilds]}")
-    for guild in bot.guilds:
-        await ensure_leaderboard_channels(guild)
 
+async def _delayed_post(guild: discord.Guild, delay: float):
+    await asyncio.sleep(delay)
+    _pending_refresh.pop(guild.id, None)
+    try:
+        await _post_today_leaderboards(guild)
+    except Exception as e:
+        print(f"[_post_today_leaderboards] error in guild {guild.id}: {e}")
 
-@bot.event
-async def on_guild_join(guild: discord.Guild):
-    await ensure_leaderboard_channels(guild)
 
+def _schedule_refresh(guild: discord.Guild, delay: float = LEADERBOARD_REFRESH_DELAY):
+    """Refresh the leaderboard channels after `delay`s; new calls reset the timer."""
+    task = _pending_refresh.get(guild.id)
+    if task is not None:
+        task.cancel()
+    _pending_refresh[guild.id] = asyncio.create_task(_delayed_post(guild, delay))
 
-@bot.event
-async def on_message(message: discord.Message):
-    # Always ignore ourselves / bots
-    if message.author.bot:
-        return
 
-    # Ignore hashtag logging commands in leaderboard channels
-    if (
-        isinstance(message.channel, discord.TextChannel)
-        and message.channel.name in LEADERBOARD_CHANNELS
-    ):
-        # Still allow !commands like !leaderboard / !help if you ever enable them there
-        await bot.process_commands(message)
-        return
+# ------------------------
+# Hashtag handlers
+# ------------------------
 
-    content = message.content.strip()
-    lower = content.lower()
 
-    # ------------------------
-    # #sold @Setter Customer Name kW
-    # or:   #sold SetterName Customer Name kW
-    # ------------------------
-    if lower.startswith("#sold"):
-        try:
-            parts = content.split()
-            if len(parts) < 4:
+# #sold @Setter Customer Name kW
+# or:   #sold SetterName Customer Name kW
+async def _handle_sold(message: discord.Message, content: str):
+    try:
+        m = _SOLD_RE.match(content)
+        if not m:
+            raise ValueError
+        kw = float(m["kw"])
+        customer_name = m["customer"]
+
+        if m["mention"]:
+            # The regex already captured the id of the mention right after
+            # #sold; look it up directly instead of walking message.mentions.
+            mention_id = int(m["mention"])
+            setter_member = message.guild.get_member(mention_id)
+            if setter_member is None:
+                # Member cache miss: the mention itself still carries the user.
+                # message.mentions isn't in text order, so match by id.
+                setter_member = next((u for u in message.mentions if u.id == mention_id), None)
+            if setter_member is None:
                 raise ValueError
-
-            setter_member = message.mentions[0] if message.mentions else None
-            setter_name = None
+            setter_id = setter_member.id
+            setter_name = setter_member.display_name
+        else:
+            # #sold SetterName Customer Name 6.5
             setter_id = None
-            kw = None
-            customer_name = None
-
-            if setter_member:
-                mention_token = None
-                for p in parts:
-                    if p.startswith("<@") and p.endswith(">"):
-                        mention_token = p
-                        break
-                if mention_token is None:
-                    raise ValueError
-                idx = parts.index(mention_token)
-                if len(parts) - idx < 2:
-                    raise ValueError
-                kw_token = parts[-1]
-                kw = float(kw_token)
-                customer_tokens = parts[idx + 1 : -1]
-                if not customer_tokens:
-                    raise ValueError
-                customer_name = " ".join(customer_tokens)
-                setter_id = setter_member.id
-                setter_name = setter_member.display_name
-            else:
-                # #sold SetterName Customer Name 6.5
-                kw_token = parts[-1]
-                kw = float(kw_token)
-                setter_name = parts[1]
-                setter_id = None
-                customer_tokens = parts[2:-1]
-                if not customer_tokens:
-                    raise ValueError
-                customer_name = " ".join(customer_tokens)
-
-            closer_member = message.author
-            closer_name = closer_member.display_name
+            setter_name = m["setter"]
+
+        closer_member = message.author
+        closer_name = closer_member.display_name
 
+        async with _guild_locks[message.guild.id]:
             deal = _add_deal(
                 guild_id=message.guild.id,
                 setter_id=setter_id,
@@ -504,159 +816,245 @@ async def on_message(message: discord.Message):
                 kw=kw,
             )
 
-            embed = discord.Embed(
-                title="🎉 Deal Sold!",
-                color=0x2ecc71,
-            )
-            embed.add_field(
-                name="Customer", value=deal["customer_name"], inline=True
-            )
-            embed.add_field(
-                name="Setter", value=setter_name or "N/A", inline=True
-            )
-            embed.add_field(name="Closer", value=closer_name, inline=True)
-            embed.add_field(
-                name="System Size", value=f"{deal['kw']:.1f} kW", inline=True
-            )
-            embed.set_footer(
-                text=f"Deal ID: {deal['id']} • Logged via #sold"
-            )
+        embed = discord.Embed(
+            title="🎉 Deal Sold!",
+            color=0x2ecc71,
+        )
+        embed.add_field(
+            name="Customer", value=deal["customer_name"], inline=True
+        )
+        embed.add_field(
+            name="Setter", value=setter_name or "N/A", inline=True
+        )
+        embed.add_field(name="Closer", value=closer_name, inline=True)
+        embed.add_field(
+            name="System Size", value=f"{deal['kw']:.1f} kW", inline=True
+        )
+        embed.set_footer(
+            text=f"Deal ID: {deal['id']} • Logged via #sold"
+        )
 
-            await message.channel.send(embed=embed)
-            await _post_today_leaderboards(message.guild)
+        await message.channel.send(embed=embed)
+        _schedule_refresh(message.guild)
 
-        except ValueError:
-            await message.channel.send(
-                "❌ Invalid `#sold` format.\n"
-                "Use: `#sold @Setter Customer Name kW`\n"
-                "Example: `#sold @Devin John Smith 6.5`"
-            )
-        except Exception as e:
-            await message.channel.send(f"❌ Error processing sale: {e}")
+    except ValueError:
+        await message.channel.send(
+            "❌ Invalid `#sold` format.\n"
+            "Use: `#sold @Setter Customer Name kW`\n"
+            "Example: `#sold @Devin John Smith 6.5`"
+        )
+    except Exception as e:
+        await message.channel.send(f"❌ Error processing sale: {e}")
 
-        return
 
-    # ------------------------
-    # #cancel Customer Name  (marks last deal for that customer as canceled)
-    # ------------------------
-    if lower.startswith("#cancel"):
-        try:
-            parts = content.split(maxsplit=1)
-            if len(parts) < 2:
-                raise ValueError
-            customer_name = parts[1].strip()
+# #cancel Customer Name  (marks last deal for that customer as canceled)
+async def _handle_cancel(message: discord.Message, content: str):
+    try:
+        parts = content.split(maxsplit=1)
+        if len(parts) < 2:
+            raise ValueError
+        customer_name = parts[1].strip()
+        async with _guild_locks[message.guild.id]:
             deal = _find_latest_deal_by_customer(message.guild.id, customer_name)
-            if not deal:
-                await message.channel.send(
-                    f"❌ No deal found for customer `{customer_name}`."
-                )
-                return
-
-            if deal.get("status") == "canceled":
-                await message.channel.send(
-                    f"ℹ️ Latest deal for `{customer_name}` is already marked as canceled."
+            already_canceled = deal is not None and deal.get("status") == "canceled"
+            if deal is not None and not already_canceled:
+                _agg_apply(deal, -1)
+                deal["status"] = "canceled"
+                deal["canceled_at"] = _now_utc().isoformat()
+                _log_append(
+                    {
+                        "op": "cancel",
+                        "id": deal["id"],
+                        "canceled_at": deal["canceled_at"],
+                    }
                 )
-                return
 
-            deal["status"] = "canceled"
-            deal["canceled_at"] = _now_utc().isoformat()
-            _save_deals(DEALS_DATA)
-
-            embed = discord.Embed(
-                title="⚠️ Deal Canceled After Signing",
-                color=0xe67e22,
-                description=f"Customer: **{deal['customer_name']}**",
+        if not deal:
+            await message.channel.send(
+                f"❌ No deal found for customer `{customer_name}`."
             )
-            embed.add_field(
-                name="Original Closer",
-                value=deal.get("closer_name", "Unknown"),
-                inline=True,
+            return
+
+        if already_canceled:
+            await message.channel.send(
+                f"ℹ️ Latest deal for `{customer_name}` is already marked as canceled."
             )
-            if deal.get("setter_name"):
-                embed.add_field(
-                    name="Setter", value=deal["setter_name"], inline=True
-                )
+            return
+
+        embed = discord.Embed(
+            title="⚠️ Deal Canceled After Signing",
+            color=0xe67e22,
+            description=f"Customer: **{deal['customer_name']}**",
+        )
+        embed.add_field(
+            name="Original Closer",
+            value=deal.get("closer_name", "Unknown"),
+            inline=True,
+        )
+        if deal.get("setter_name"):
             embed.add_field(
-                name="System Size",
-                value=f"{deal['kw']:.1f} kW",
-                inline=True,
+                name="Setter", value=deal["setter_name"], inline=True
             )
-            await message.channel.send(embed=embed)
+        embed.add_field(
+            name="System Size",
+            value=f"{deal['kw']:.1f} kW",
+            inline=True,
+        )
+        await message.channel.send(embed=embed)
 
-            await _post_today_leaderboards(message.guild)
+        _schedule_refresh(message.guild)
+
+    except ValueError:
+        await message.channel.send("❌ Use: `#cancel Customer Name`")
+    except Exception as e:
+        await message.channel.send(f"❌ Error marking canceled: {e}")
 
-        except ValueError:
-            await message.channel.send("❌ Use: `#cancel Customer Name`")
-        except Exception as e:
-            await message.channel.send(f"❌ Error marking canceled: {e}")
-        return
 
-    # ------------------------
-    # #delete Customer Name  (admin/manager only)
-    # ------------------------
-    if lower.startswith("#delete"):
-        perms = message.author.guild_permissions
-        has_power_role = any(
-            r.name.lower() in {"admin", "manager"}
-            for r in getattr(message.author, "roles", [])
+# #delete Customer Name  (admin/manager only)
+async def _handle_delete(message: discord.Message, content: str):
+    perms = message.author.guild_permissions
+    has_power_role = any(
+        r.name.lower() in {"admin", "manager"}
+        for r in getattr(message.author, "roles", [])
+    )
+    if not (perms.administrator or has_power_role):
+        await message.channel.send(
+            "⛔ Only admins or managers can delete deals."
         )
-        if not (perms.administrator or has_power_role):
+        return
+
+    try:
+        parts = content.split(maxsplit=1)
+        if len(parts) < 2:
+            raise ValueError
+        customer_name = parts[1].strip()
+        async with _guild_locks[message.guild.id]:
+            deal = _find_latest_deal_by_customer(message.guild.id, customer_name)
+            if deal is not None:
+                _index_remove(deal)
+                DEALS_DATA["deals"] = [
+                    d for d in DEALS_DATA["deals"] if d["id"] != deal["id"]
+                ]
+                _log_append({"op": "delete", "id": deal["id"]})
+
+        if not deal:
             await message.channel.send(
-                "⛔ Only admins or managers can delete deals."
+                f"❌ No deal found for customer `{customer_name}`."
             )
             return
 
-        try:
-            parts = content.split(maxsplit=1)
-            if len(parts) < 2:
-                raise ValueError
-            customer_name = parts[1].strip()
-            deal = _find_latest_deal_by_customer(message.guild.id, customer_name)
-            if not deal:
-                await message.channel.send(
-                    f"❌ No deal found for customer `{customer_name}`."
-                )
-                return
+        await message.channel.send(
+            f"🗑️ Deleted latest deal for `{customer_name}` from stats."
+        )
+        _schedule_refresh(message.guild)
 
-            DEALS_DATA["deals"] = [
-                d for d in DEALS_DATA["deals"] if d["id"] != deal["id"]
-            ]
-            _save_deals(DEALS_DATA)
+    except ValueError:
+        await message.channel.send("❌ Use: `#delete Customer Name`")
+    except Exception as e:
+        await message.channel.send(f"❌ Error deleting deal: {e}")
 
-            await message.channel.send(
-                f"🗑️ Deleted latest deal for `{customer_name}` from stats."
-            )
-            await _post_today_leaderboards(message.guild)
 
-        except ValueError:
-            await message.channel.send("❌ Use: `#delete Customer Name`")
-        except Exception as e:
-            await message.channel.send(f"❌ Error deleting deal: {e}")
+# #clearleaderboard  (admin/manager only, wipes all deals for this guild)
+async def _handle_clearleaderboard(message: discord.Message, content: str):
+    perms = message.author.guild_permissions
+    has_power_role = any(
+        r.name.lower() in {"admin", "manager"}
+        for r in getattr(message.author, "roles", [])
+    )
+    if not (perms.administrator or has_power_role):
+        await message.channel.send(
+            "⛔ Only admins or managers can clear the leaderboard."
+        )
         return
 
-    # ------------------------
-    # #clearleaderboard  (admin/manager only, wipes all deals for this guild)
-    # ------------------------
-    if lower.startswith("#clearleaderboard"):
-        perms = message.author.guild_permissions
-        has_power_role = any(
-            r.name.lower() in {"admin", "manager"}
-            for r in getattr(message.author, "roles", [])
-        )
-        if not (perms.administrator or has_power_role):
-            await message.channel.send(
-                "⛔ Only admins or managers can clear the leaderboard."
-            )
-            return
+    # Only this guild's deals are touched here; the master list is
+    # filtered at the next snapshot.
+    async with _guild_locks[message.guild.id]:
+        _dropped_ids.update(d["id"] for d in _get_guild_deals(message.guild.id))
+        _index_drop_guild(message.guild.id)
+        _log_append({"op": "clear", "guild_id": message.guild.id})
+    await message.channel.send(
+        "🔥 All deals for this server have been cleared. Fresh start!"
+    )
+    _schedule_refresh(message.guild)
 
-        DEALS_DATA["deals"] = [
-            d for d in DEALS_DATA["deals"] if d.get("guild_id") != message.guild.id
-        ]
-        _save_deals(DEALS_DATA)
+
+_HASHTAG_HANDLERS = {
+    "#sold": _handle_sold,
+    "#cancel": _handle_cancel,
+    "#delete": _handle_delete,
+    "#clearleaderboard": _handle_clearleaderboard,
+}
+
+
+# ------------------------
+# Events
+# ------------------------
+
+
+_snapshot_task: asyncio.Task | None = None
+
+
+@bot.event
+async def on_ready():
+    global _snapshot_task
+    print(f"{bot.user} has connected to Discord!")
+    print(f"Guilds: {[g.name for g in bot.guilds]}")
+    # on_ready fires again after reconnects; only start the loop once
+    if _snapshot_task is None:
+        _snapshot_task = asyncio.create_task(_snapshot_loop())
+    for guild in bot.guilds:
+        await ensure_leaderboard_channels(guild)
+
+
+@bot.event
+async def on_guild_join(guild: discord.Guild):
+    await ensure_leaderboard_channels(guild)
+
+
+@bot.event
+async def on_guild_channel_delete(channel):
+    _forget_lb_channel(channel)
+
+
+@bot.event
+async def on_guild_channel_update(before, after):
+    _forget_lb_channel(before)
+
+
+@bot.event
+async def on_message(message: discord.Message):
+    # Always ignore ourselves / bots
+    if message.author.bot:
+        return
+
+    # Ignore hashtag logging commands in leaderboard channels
+    if (
+        isinstance(message.channel, discord.TextChannel)
+        and message.channel.name in LEADERBOARD_CHANNELS
+    ):
+        # Still allow !commands like !leaderboard / !help if you ever enable them there
+        await bot.process_commands(message)
+        return
+
+    content = message.content.strip()
+    if not content.startswith("#"):
+        await bot.process_commands(message)
+        return
+
+    tag = content.split(None, 1)[0].lower()
+    handler = _HASHTAG_HANDLERS.get(tag)
+    if handler is not None:
+        await handler(message, content)
+        return
+
+    # Tags only match as a whole word, so "#sold<@id> 5" or "#cancelled Jane"
+    # don't run a handler; say so instead of ignoring them silently
+    known = next((t for t in _HASHTAG_HANDLERS if tag.startswith(t)), None)
+    if known is not None:
         await message.channel.send(
-            "🔥 All deals for this server have been cleared. Fresh start!"
+            f"❌ Unrecognized `{tag}`. Did you mean `{known}`? Put a space after the tag."
         )
-        await _post_today_leaderboards(message.guild)
         return
 
     # Let prefix commands (like !leaderboard, !help) still work
@@ -719,6 +1117,9 @@ async def leaderboard_cmd(
     ) = _period_bounds(period, base_dt_local)
 
     deals = _filter_deals_period(ctx.guild.id, start_utc, end_utc)
+    by_closer = _aggregate_from_index(
+        ctx.guild.id, start_local.date(), end_local.date()
+    )
 
     if period in {"day", "today"}:
         date_label = start_local.date().isoformat()
@@ -733,6 +1134,7 @@ async def leaderboard_cmd(
     embed = _build_leaderboard_embed(
         ctx.guild,
         deals,
+        by_closer,
         pretty_period,
         date_label,
     )
@@ -746,15 +1148,10 @@ async def mystats_cmd(ctx: commands.Context):
         await ctx.send("This command only works in a server.")
         return
 
-    user_id = ctx.author.id
-    deals = [
-        d
-        for d in _get_guild_deals(ctx.guild.id)
-        if d.get("closer_id") == user_id and d.get("status") != "canceled"
-    ]
-
-    total_deals = len(deals)
-    total_kw = sum(float(d.get("kw") or 0.0) for d in deals)
+    # AGG already holds this closer's per-day totals; no deal scan needed
+    buckets = AGG.get(ctx.guild.id, {}).get(ctx.author.id, {}).values()
+    total_deals = sum(b["deals"] for b in buckets)
+    total_kw = math.fsum(b["kw"] for b in buckets)
 
     embed = discord.Embed(
         title=f"📊 Stats for {ctx.author.display_name}",